@@ -2,6 +2,11 @@
 """
 Backfill script to re-process all existing videos
 Adds summaries and transcripts without sending emails
+
+Usage: backfill_videos.py [--yes] [--batch] [--stale]
+  --batch  Submit all pending summaries as one Anthropic Message Batch
+           (a running batch is resumed after a restart)
+  --stale  Also regenerate summaries made with an older prompt version
 """
 
 import sys
@@ -24,6 +29,10 @@ if __name__ == "__main__":
             exit(0)
 
     summarizer = YouTubeSummarizer()
-    summarizer.backfill_existing_videos()
+    stale = "--stale" in sys.argv
+    if "--batch" in sys.argv:
+        summarizer.backfill_with_batch(stale)
+    else:
+        summarizer.backfill_existing_videos(stale)
 
     print("\n✅ Fertig! Starte die Web-App neu um die Änderungen zu sehen.")
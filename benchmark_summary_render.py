@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: shared single-pass summary renderer vs. the old markdown_to_html
+
+Usage: benchmark_summary_render.py [--number N]
+"""
+
+import re
+import sys
+import timeit
+
+from summary_render import cached_html, render, render_fields
+
+
+def legacy_markdown_to_html(text):
+    """The previous renderer from web_app.py (five re.sub passes plus a line loop)"""
+    text = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', text)
+    text = re.sub(r'\*([^*]+)\*', r'<em>\1</em>', text)
+    text = re.sub(r'^# (.+)$', r'<h3 style="color: #f1f1f1; margin-top: 20px; margin-bottom: 10px; font-size: 18px;">\1</h3>', text, flags=re.MULTILINE)
+    text = re.sub(r'^## (.+)$', r'<h4 style="color: #ccc; margin-top: 15px; margin-bottom: 8px; font-size: 16px;">\1</h4>', text, flags=re.MULTILINE)
+    text = re.sub(r'^([A-ZÄÖÜ][A-ZÄÖÜ\s]+)$', r'<h3 style="color: #ff0000; margin-top: 20px; margin-bottom: 10px; font-size: 16px;">\1</h3>', text, flags=re.MULTILINE)
+
+    lines = text.split('\n')
+    html_lines = []
+    in_list = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('- '):
+            if not in_list:
+                html_lines.append('<ul style="margin: 10px 0; padding-left: 20px;">')
+                in_list = True
+            html_lines.append(f'<li style="margin: 5px 0;">{stripped[2:]}</li>')
+        else:
+            if in_list:
+                html_lines.append('</ul>')
+                in_list = False
+            if stripped == '':
+                html_lines.append('<br>')
+            elif not stripped.startswith('<'):
+                html_lines.append(f'<p style="margin: 8px 0; line-height: 1.6;">{line}</p>')
+            else:
+                html_lines.append(line)
+    if in_list:
+        html_lines.append('</ul>')
+    return '\n'.join(html_lines)
+
+
+def sample_summary(points=15):
+    """A summary in the format the prompt asks for"""
+    lines = [
+        'SCHNELLÜBERSICHT',
+        'In diesem Video lernst du 15 konkrete Strategien, um deine Produktivität zu verdoppeln. '
+        'Die wichtigsten Erkenntnisse: Zeit-Blocking ist effektiver als To-Do-Listen.',
+        '',
+        'HAUPTTHEMA',
+        'Produktivität ist nicht nur eine Frage der Zeitverwaltung, sondern auch der **mentalen Energie**.',
+        '',
+        'KERNPUNKTE',
+    ]
+    lines += [f'{i}. Strategie {i}: Plane feste Zeitblöcke für Aufgaben statt vage To-Do-Listen, '
+              f'und mache nach *jedem* Block eine kurze Pause.' for i in range(1, points + 1)]
+    lines += ['', '- Erster Tipp', '- Zweiter Tipp', '', 'FAZIT',
+              'Die Strategien zeigen, dass kleine Änderungen große Wirkung haben können.']
+    return '\n'.join(lines)
+
+
+def main():
+    number = int(sys.argv[sys.argv.index('--number') + 1]) if '--number' in sys.argv else 2000
+    summary = sample_summary()
+    cards = 100
+
+    same = render(summary) == legacy_markdown_to_html(summary)
+    print(f"Zusammenfassung: {len(summary)} Zeichen, identische Ausgabe: {same}")
+
+    legacy = timeit.timeit(lambda: legacy_markdown_to_html(summary), number=number)
+    single = timeit.timeit(lambda: render(summary), number=number)
+    print(f"Alter Renderer:      {legacy / number * 1e6:8.1f} µs pro Zusammenfassung")
+    print(f"Single-Pass:         {single / number * 1e6:8.1f} µs pro Zusammenfassung "
+          f"({legacy / single:.1f}x schneller)")
+
+    # A dashboard page view: previews of `cards` videos
+    record = dict({'summary': summary}, **render_fields(summary))
+    page_legacy = timeit.timeit(
+        lambda: [legacy_markdown_to_html(summary[:200] + '...') for _ in range(cards)], number=number // 10)
+    page_cached = timeit.timeit(
+        lambda: [cached_html(record, preview=True) for _ in range(cards)], number=number // 10)
+    print(f"Dashboard ({cards} Karten), live gerendert: {page_legacy / (number // 10) * 1e3:6.2f} ms")
+    print(f"Dashboard ({cards} Karten), gespeichert:    {page_cached / (number // 10) * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
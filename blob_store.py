@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Content-addressed, compressed blob store
+Large texts (transcripts) live here instead of inline in the state records
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+BLOB_DIR = Path('/data/blobs')
+
+
+class BlobStore:
+    """Stores gzip-compressed blobs under the SHA-256 of their content"""
+
+    def __init__(self, root=BLOB_DIR):
+        self.root = Path(root)
+
+    def _path(self, ref):
+        # Fan out into subdirectories so no single directory grows huge
+        return self.root / ref[:2] / f"{ref[2:]}.gz"
+
+    def put(self, text):
+        """Store text and return its reference (idempotent)"""
+        return self.put_bytes(text.encode('utf-8'))
+
+    def put_bytes(self, data):
+        """Store binary data and return its reference (idempotent)"""
+        ref = hashlib.sha256(data).hexdigest()
+        path = self._path(ref)
+        if path.exists():
+            return ref
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file first so readers never see a half-written blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(data, mtime=0))
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return ref
+
+    def get(self, ref):
+        """Return the text for a reference, or None if it is missing"""
+        data = self.get_bytes(ref)
+        return data.decode('utf-8') if data is not None else None
+
+    def get_bytes(self, ref):
+        """Return the binary data for a reference, or None if it is missing"""
+        try:
+            with open(self._path(ref), 'rb') as f:
+                return gzip.decompress(f.read())
+        except FileNotFoundError:
+            return None
+
+    def exists(self, ref):
+        return self._path(ref).exists()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Durable email outbox
+Summaries are queued in the state store and delivered over one long-lived
+SMTP connection, optionally combined into a digest per cycle.
+"""
+
+import os
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import metrics
+
+# Retry failed deliveries with growing delays, give up after MAX_ATTEMPTS
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+MAX_ATTEMPTS = 10
+
+SMTP_SEND_SECONDS = metrics.histogram('smtp_send_seconds', 'Duration of one SMTP delivery', ['result'])
+EMAILS = metrics.counter('emails_total', 'Videos delivered by email or failed (per attempt)', ['result'])
+
+
+def render_email(sections):
+    """Wrap one or more rendered video sections into the email layout"""
+    separator = '\n<hr style="border: none; border-top: 4px solid #FF0000; margin: 40px 0;">\n'
+    return f"""
+            <html>
+              <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9;">
+                <div style="background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+{separator.join(sections)}
+                  <hr style="border: none; border-top: 2px solid #eee; margin: 20px 0;">
+                  <p style="color: #999; font-size: 12px; text-align: center; margin-bottom: 0;">Automatisch generiert von deinem YouTube Watch Later Bot 🤖</p>
+                </div>
+              </body>
+            </html>
+            """
+
+
+class SmtpConnection:
+    """One authenticated SMTP connection, reused across messages and reopened when it drops"""
+
+    def __init__(self, server, port, username, password, starttls=True, timeout=30):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._smtp = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            server=os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
+            port=int(os.getenv('SMTP_PORT', '587')),
+            username=os.getenv('EMAIL_FROM'),
+            password=os.getenv('EMAIL_PASSWORD'),
+            starttls=os.getenv('SMTP_STARTTLS', 'true').lower() in ('1', 'true', 'yes'),
+        )
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.password:
+            smtp.login(self.username, self.password)
+        self._smtp = smtp
+        print(f"📡 SMTP-Verbindung zu {self.server}:{self.port} aufgebaut")
+
+    def _is_alive(self):
+        try:
+            return self._smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, msg):
+        # The server may have closed an idle connection since the last cycle
+        if self._smtp is None or not self._is_alive():
+            self.close()
+            self._connect()
+        try:
+            self._smtp.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Dropped between the check and the send: reconnect once
+            self.close()
+            self._connect()
+            self._smtp.send_message(msg)
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+class MailOutbox:
+    """Delivers queued emails from the state store (see StateStore.upsert(mail=...))"""
+
+    def __init__(self, store, connection, email_from, email_to, digest=False):
+        self.store = store
+        self.connection = connection
+        self.email_from = email_from
+        self.email_to = email_to
+        self.digest = digest
+        self._lock = threading.Lock()
+
+    def _message(self, subject, sections):
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = self.email_from
+        msg['To'] = self.email_to
+        msg.attach(MIMEText(render_email(sections), 'html'))
+        return msg
+
+    def _deliver(self, mails, subject):
+        ids = [mail['id'] for mail in mails]
+        try:
+            with SMTP_SEND_SECONDS.time(result='error') as labels:
+                self.connection.send(self._message(subject, [mail['html'] for mail in mails]))
+                labels['result'] = 'sent'
+        except Exception as e:
+            EMAILS.inc(len(mails), result='failed')
+            attempts = max(mail['attempts'] for mail in mails) + 1
+            delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+            self.store.mark_mails_failed(ids, str(e), time.time() + delay, MAX_ATTEMPTS)
+            self.connection.close()
+            print(f"❌ Fehler beim Email-Versand: {e} (neuer Versuch in {delay // 60} Minuten)")
+            return 0
+        self.store.mark_mails_sent(ids)
+        EMAILS.inc(len(mails), result='sent')
+        return len(mails)
+
+    def drain(self):
+        """Send everything that is due. Returns the number of videos delivered."""
+        with self._lock:
+            mails = self.store.due_mails()
+            if not mails:
+                return 0
+
+            if self.digest and len(mails) > 1:
+                sent = self._deliver(mails, f"📺 YouTube Zusammenfassungen: {len(mails)} neue Videos")
+                if sent:
+                    print(f"✅ Digest-Email mit {sent} Videos gesendet")
+                return sent
+
+            sent = 0
+            for mail in mails:
+                if self._deliver([mail], f"📺 YouTube Zusammenfassung: {mail['title']}"):
+                    print(f"✅ Email gesendet für: {mail['title']}")
+                    sent += 1
+                else:
+                    # Server probably unreachable, the rest waits for the next cycle
+                    break
+            return sent
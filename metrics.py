@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Minimal Prometheus metrics (counters, gauges, histograms) in the text format
+Worker and web app are separate processes: the worker writes its metrics to a
+snapshot file every few seconds, /metrics in the web app serves that snapshot
+together with its own live values.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+METRICS_DIR = Path('/data/metrics')
+PREFIX = 'yts_'
+
+# Seconds; covers fast cache hits up to long map-reduce summaries
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=(), function=None):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        # Optional: values are read from function() at render time instead of being recorded.
+        # It returns a number (no labels) or {label values tuple: number}.
+        self.function = function
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        if self.function is not None:
+            try:
+                values = self.function()
+            except Exception as e:
+                print(f"⚠️  Metrik {self.name} nicht lesbar: {e}")
+                return []
+            values = values if isinstance(values, dict) else {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return self._header() + [f'{self.name}{_labels(self.labelnames, key)} {_number(value)}'
+                                 for key, value in sorted(values.items()) if value is not None]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block; labels may be changed inside it (e.g. the result)"""
+        started = time.monotonic()
+        try:
+            yield labels
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def render(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = self._header()
+        for key, (counts, total) in values:
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, [("le", _number(bound))])} {count}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {counts[-1]}')
+        return lines
+
+
+class Registry:
+    """All metrics of one process"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric, function=None):
+        with self._lock:
+            # Re-registering (e.g. a second instance of a class) returns the existing metric
+            metric = self._metrics.setdefault(metric.name, metric)
+        if function is not None:
+            metric.function = function
+        return metric
+
+    def counter(self, name, help_text, labelnames=(), function=None):
+        return self._register(Counter(name, help_text, labelnames), function)
+
+    def gauge(self, name, help_text, labelnames=(), function=None):
+        return self._register(Gauge(name, help_text, labelnames), function)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+def write_snapshot(process, directory=METRICS_DIR):
+    """Write this process's metrics for the web app (atomic replace)"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(REGISTRY.render())
+        os.replace(tmp_path, directory / f'{process}.prom')
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def read_snapshot(process, directory=METRICS_DIR):
+    """(text, age in seconds) of another process's last snapshot, or ('', None)"""
+    path = Path(directory) / f'{process}.prom'
+    try:
+        return path.read_text(), time.time() - path.stat().st_mtime
+    except FileNotFoundError:
+        return '', None
+
+
+def start_snapshots(process, interval=15, directory=METRICS_DIR):
+    """Write snapshots in a background thread every `interval` seconds"""
+    def loop():
+        while True:
+            try:
+                write_snapshot(process, directory)
+            except Exception as e:
+                print(f"⚠️  Metriken konnten nicht geschrieben werden: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name='metrics-snapshot', daemon=True)
+    thread.start()
+    return thread
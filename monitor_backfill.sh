@@ -1,12 +1,12 @@
 #!/bin/bash
 
-# Monitor the backfill progress by watching the processed_videos.json file
+# Monitor the backfill progress by querying the state database
 
 echo "🔄 Backfill-Monitor gestartet"
 echo "================================"
 echo ""
 
-INITIAL_COUNT=$(docker compose exec -T youtube-summarizer python3 -c "import json; data=json.load(open('/data/processed_videos.json')); print(sum(1 for v in data.values() if isinstance(v, dict) and v.get('summary')))" 2>/dev/null)
+INITIAL_COUNT=$(docker compose exec -T youtube-summarizer python3 -c "import sqlite3; print(sqlite3.connect('/data/state.db').execute(\"SELECT COUNT(*) FROM videos WHERE summary <> ''\").fetchone()[0])" 2>/dev/null)
 
 echo "Videos mit Zusammenfassung: $INITIAL_COUNT"
 echo ""
@@ -16,7 +16,7 @@ echo ""
 
 while true; do
     sleep 30
-    CURRENT_COUNT=$(docker compose exec -T youtube-summarizer python3 -c "import json; data=json.load(open('/data/processed_videos.json')); print(sum(1 for v in data.values() if isinstance(v, dict) and v.get('summary')))" 2>/dev/null)
+    CURRENT_COUNT=$(docker compose exec -T youtube-summarizer python3 -c "import sqlite3; print(sqlite3.connect('/data/state.db').execute(\"SELECT COUNT(*) FROM videos WHERE summary <> ''\").fetchone()[0])" 2>/dev/null)
     DIFF=$((CURRENT_COUNT - INITIAL_COUNT))
     echo "$(date '+%H:%M:%S') - Videos mit Zusammenfassung: $CURRENT_COUNT (+$DIFF)"
 done
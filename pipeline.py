@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Minimal staged pipeline: every stage has its own bounded queue and worker threads
+Items flow through the stages in order, so later items can be fetched while
+earlier ones are still being summarized.
+"""
+
+import queue
+import threading
+import traceback
+
+_STOP = object()
+
+
+class Stage:
+    """One pipeline stage.
+
+    func(item) returns the item for the next stage, or None to drop it
+    (e.g. when it was already handled or failed).
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        # Bounded queue gives backpressure to the previous stage
+        self.queue = queue.Queue(maxsize=queue_size or self.workers * 2)
+        self.threads = []
+
+
+class StagedPipeline:
+    def __init__(self, stages):
+        self.stages = stages
+
+    def _work(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                return
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                print(f"❌ Fehler in Stufe '{stage.name}': {e}")
+                traceback.print_exc()
+                continue
+            if result is not None and next_stage is not None:
+                next_stage.queue.put(result)
+
+    def run(self, items):
+        """Push all items through the pipeline and wait until every stage is drained"""
+        for index, stage in enumerate(self.stages):
+            stage.threads = [
+                threading.Thread(target=self._work, args=(index,),
+                                 name=f"{stage.name}-{n + 1}", daemon=True)
+                for n in range(stage.workers)
+            ]
+            for thread in stage.threads:
+                thread.start()
+
+        for item in items:
+            self.stages[0].queue.put(item)
+
+        # Shut the stages down in order: a stage only stops after the previous one
+        # has finished, so nothing is put into a queue that nobody reads anymore
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+            for thread in stage.threads:
+                thread.join()
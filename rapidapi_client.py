@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Pooled RapidAPI client
+One keep-alive session for all calls; every key tracks its health (quota from
+the response headers, last 429/403, cooldown) and requests go to the key that
+is most likely to succeed.
+"""
+
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RAPIDAPI_HOST = 'yt-api.p.rapidapi.com'
+
+# Cooldowns when the response does not say when the quota resets
+RATE_LIMIT_COOLDOWN = 60.0
+FORBIDDEN_COOLDOWN = 6 * 3600.0  # 403: key is not subscribed to the API
+ERROR_COOLDOWN = 30.0
+
+
+def _number(headers, name):
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class KeyHealth:
+    """What we know about one API key"""
+
+    def __init__(self, index, key):
+        self.index = index
+        self.key = key
+        self.remaining = None       # from x-ratelimit-requests-remaining
+        self.limit = None           # from x-ratelimit-requests-limit
+        self.cooldown_until = 0.0
+        self.last_rate_limited = None
+        self.last_forbidden = None
+        self.successes = 0
+        self.failures = 0
+        self.last_used = 0.0
+
+    def available(self, now):
+        return self.cooldown_until <= now
+
+    def score(self):
+        """Sort key, best first: known remaining quota, success rate, least recently used"""
+        quota = self.remaining / self.limit if self.remaining is not None and self.limit else 0.5
+        success_rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        return (-quota, -success_rate, self.last_used)
+
+    def cool_down(self, seconds):
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+
+class RapidApiPool:
+    """Thread-safe client for one RapidAPI host with several keys"""
+
+    def __init__(self, keys, host=RAPIDAPI_HOST, base_url=None, pool_size=10, timeout=30):
+        self.host = host
+        self.base_url = (base_url or f'https://{host}').rstrip('/')
+        self.timeout = timeout
+        self.keys = [KeyHealth(i + 1, key) for i, key in enumerate(keys)]
+        self._lock = threading.Lock()
+
+        # Keep-alive connections shared by all transcript workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.stats = {'requests': 0, 'rate_limited': 0, 'forbidden': 0, 'skipped_cooldown': 0}
+
+    @classmethod
+    def from_env(cls, pool_size=10):
+        # Support multiple RapidAPI keys (comma-separated in .env)
+        keys = [key.strip() for key in os.getenv('RAPIDAPI_KEYS', '').split(',') if key.strip()]
+        # RAPIDAPI_BASE_URL allows pointing at a local stand-in for testing
+        return cls(keys, base_url=os.getenv('RAPIDAPI_BASE_URL') or None, pool_size=pool_size)
+
+    def _ranked_keys(self):
+        now = time.monotonic()
+        with self._lock:
+            available = [k for k in self.keys if k.available(now)]
+            self.stats['skipped_cooldown'] += len(self.keys) - len(available)
+            return sorted(available, key=KeyHealth.score)
+
+    def _update(self, health, response):
+        """Learn quota and cooldowns from a response"""
+        headers = response.headers
+        with self._lock:
+            health.last_used = time.monotonic()
+            remaining = _number(headers, 'x-ratelimit-requests-remaining')
+            limit = _number(headers, 'x-ratelimit-requests-limit')
+            reset = _number(headers, 'x-ratelimit-requests-reset')
+            if remaining is not None:
+                health.remaining = remaining
+            if limit is not None:
+                health.limit = limit
+
+            if response.status_code == 429:
+                self.stats['rate_limited'] += 1
+                health.failures += 1
+                health.last_rate_limited = time.time()
+                retry_after = _number(headers, 'retry-after')
+                health.cool_down(retry_after or reset or RATE_LIMIT_COOLDOWN)
+            elif response.status_code == 403:
+                self.stats['forbidden'] += 1
+                health.failures += 1
+                health.last_forbidden = time.time()
+                health.cool_down(FORBIDDEN_COOLDOWN)
+            elif response.status_code >= 500:
+                health.failures += 1
+                health.cool_down(ERROR_COOLDOWN)
+            else:
+                health.successes += 1
+                # Quota used up: don't try this key again before the reset
+                if remaining == 0:
+                    health.cool_down(reset or RATE_LIMIT_COOLDOWN)
+
+    def get(self, path, params=None):
+        """GET an API endpoint with the healthiest key, falling over to the next one.
+
+        Returns the first response that is not 429/403/5xx, or None if no key works.
+        """
+        keys = self._ranked_keys()
+        if not keys:
+            print(f"⏳ RapidAPI: alle {len(self.keys)} Keys in Cooldown")
+            return None
+
+        for health in keys:
+            print(f"🔄 Versuche RapidAPI (Key {health.index}/{len(self.keys)})...")
+            with self._lock:
+                self.stats['requests'] += 1
+            try:
+                response = self.session.get(
+                    f'{self.base_url}{path}',
+                    headers={'x-rapidapi-key': health.key, 'x-rapidapi-host': self.host},
+                    params=params,
+                    timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                print(f"❌ RapidAPI Fehler mit Key {health.index}: {e}")
+                with self._lock:
+                    health.failures += 1
+                    health.cool_down(ERROR_COOLDOWN)
+                continue
+
+            self._update(health, response)
+            if response.status_code == 429:
+                print(f"⚠️  RapidAPI Key {health.index} hat Rate Limit erreicht, versuche nächsten...")
+            elif response.status_code == 403:
+                print(f"⚠️  RapidAPI Key {health.index}: Nicht für diese API subscribed")
+            elif response.status_code >= 500:
+                print(f"❌ RapidAPI Error {response.status_code}: {response.text[:100]}")
+            else:
+                return response
+        return None
+
+    def health(self):
+        """Per-key status for logging (keys are masked)"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'key': f"…{k.key[-4:]}",
+                'remaining': k.remaining,
+                'limit': k.limit,
+                'cooldown_seconds': round(max(0.0, k.cooldown_until - now)),
+                'successes': k.successes,
+                'failures': k.failures,
+            } for k in self.keys]
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Shared rate governor for all Anthropic API calls
+Tracks requests and input tokens per minute, learns the real account limits
+from the rate-limit response headers and backs off with jitter on 429/529.
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import anthropic
+
+WINDOW_SECONDS = 60.0
+
+# Status codes worth retrying: timeout, conflict, rate limit, server errors (incl. 529 overloaded)
+RETRYABLE_STATUS = {408, 409, 429}
+# Error types worth retrying; a streamed response reports them in an `error`
+# event, the exception then carries the stream's HTTP status 200
+RETRYABLE_ERROR_TYPES = {'overloaded_error', 'rate_limit_error', 'api_error'}
+# Errors that pause all threads
+RATE_LIMIT_STATUS = {429, 529}
+RATE_LIMIT_ERROR_TYPES = {'overloaded_error', 'rate_limit_error'}
+
+
+def error_type(error):
+    """`error.type` from the body of an Anthropic API error, or None"""
+    body = getattr(error, 'body', None)
+    if not isinstance(body, dict):
+        return None
+    details = body.get('error')
+    return details.get('type') if isinstance(details, dict) else None
+
+
+def is_retryable(error):
+    """True if an Anthropic error is transient and the call should be retried"""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return (error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+                or error_type(error) in RETRYABLE_ERROR_TYPES)
+    return False
+
+
+def is_rate_limited(error):
+    """True for rate limit and overload errors (429, 529 or the matching stream error)"""
+    return (getattr(error, 'status_code', None) in RATE_LIMIT_STATUS
+            or error_type(error) in RATE_LIMIT_ERROR_TYPES)
+
+
+def _int_header(headers, name):
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds_until(reset_value):
+    """Seconds until an RFC 3339 reset timestamp from the rate-limit headers"""
+    try:
+        reset = datetime.fromisoformat(reset_value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    return max(0.0, (reset - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateGovernor:
+    """Thread-safe sliding-window limiter shared by all Claude calls of a process.
+
+    Starts with the configured limits and switches to the limits the API
+    reports in its response headers, so throughput ramps up to whatever the
+    account allows.
+    """
+
+    def __init__(self, requests_per_minute=50, input_tokens_per_minute=30000,
+                 base_backoff=2.0, max_backoff=120.0):
+        self.requests_limit = requests_per_minute
+        self.tokens_limit = input_tokens_per_minute
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._cond = threading.Condition()
+        self._requests = deque()  # start times of requests in the window
+        self._tokens = deque()    # [start time, input tokens] per request in the window
+        self._paused_until = 0.0  # set by retry-after / exhausted rate-limit headers
+
+        self.stats = {
+            'requests': 0,
+            'throttled': 0,
+            'rate_limited': 0,
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'cache_read_tokens': 0,
+            'cache_write_tokens': 0,
+        }
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            requests_per_minute=int(os.getenv('CLAUDE_REQUESTS_PER_MINUTE', '50')),
+            input_tokens_per_minute=int(os.getenv('CLAUDE_INPUT_TOKENS_PER_MINUTE', '30000')),
+        )
+
+    @staticmethod
+    def estimate_tokens(text):
+        """Rough input token estimate (German text averages ~3 characters per token)"""
+        return len(text) // 3 + 1
+
+    def _prune(self, now):
+        while self._requests and now - self._requests[0] >= WINDOW_SECONDS:
+            self._requests.popleft()
+        while self._tokens and now - self._tokens[0][0] >= WINDOW_SECONDS:
+            self._tokens.popleft()
+
+    def _wait_time(self, now, tokens):
+        wait = self._paused_until - now
+        if len(self._requests) >= self.requests_limit:
+            wait = max(wait, self._requests[0] + WINDOW_SECONDS - now)
+        # A single request larger than the whole budget is let through once the window is empty
+        if self._tokens and sum(t for _, t in self._tokens) + tokens > self.tokens_limit:
+            wait = max(wait, self._tokens[0][0] + WINDOW_SECONDS - now)
+        return wait
+
+    def acquire(self, tokens):
+        """Block until a request with about `tokens` input tokens fits the budget.
+
+        Returns a ticket to pass to record_response().
+        """
+        with self._cond:
+            throttled = False
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    break
+                if not throttled:
+                    throttled = True
+                    self.stats['throttled'] += 1
+                    print(f"⏳ Rate Limit: warte {wait:.1f}s vor dem nächsten Claude-Aufruf...")
+                self._cond.wait(wait)
+
+            ticket = [now, tokens]
+            self._requests.append(now)
+            self._tokens.append(ticket)
+            self.stats['requests'] += 1
+            return ticket
+
+    def _pause(self, seconds):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers):
+        """Learn limits and exhausted budgets from anthropic-ratelimit-* headers"""
+        with self._cond:
+            requests_limit = _int_header(headers, 'anthropic-ratelimit-requests-limit')
+            if requests_limit:
+                self.requests_limit = requests_limit
+            tokens_limit = (_int_header(headers, 'anthropic-ratelimit-input-tokens-limit')
+                            or _int_header(headers, 'anthropic-ratelimit-tokens-limit'))
+            if tokens_limit:
+                self.tokens_limit = tokens_limit
+
+            for family in ('requests', 'tokens', 'input-tokens', 'output-tokens'):
+                if _int_header(headers, f'anthropic-ratelimit-{family}-remaining') == 0:
+                    seconds = _seconds_until(headers.get(f'anthropic-ratelimit-{family}-reset'))
+                    if seconds:
+                        self._pause(seconds)
+            self._cond.notify_all()
+
+    def record_response(self, ticket, headers, input_tokens=None, output_tokens=None,
+                        cache_read_tokens=0, cache_write_tokens=0):
+        """Account the real token usage of a finished call
+
+        Cache writes count against the input token budget, cache reads don't.
+        """
+        with self._cond:
+            if input_tokens is not None:
+                ticket[1] = input_tokens + cache_write_tokens
+                self.stats['input_tokens'] += input_tokens
+            if output_tokens is not None:
+                self.stats['output_tokens'] += output_tokens
+            self.stats['cache_read_tokens'] += cache_read_tokens
+            self.stats['cache_write_tokens'] += cache_write_tokens
+        if headers is not None:
+            self.update_from_headers(headers)
+
+    def backoff(self, error, attempt):
+        """Return how long to wait before retrying a failed call.
+
+        Honors retry-after; otherwise exponential backoff with jitter. Rate limit
+        and overload errors pause all threads, not just the caller.
+        """
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        retry_after = headers.get('retry-after')
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            ceiling = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+
+        with self._cond:
+            if is_rate_limited(error):
+                self.stats['rate_limited'] += 1
+                self._pause(delay)
+        if headers:
+            self.update_from_headers(headers)
+        return delay
@@ -9,7 +9,8 @@ echo "und fügt Zusammenfassungen + Transkripte zur Datenbank hinzu."
 echo ""
 echo "⚠️  WICHTIG:"
 echo "  - E-Mails werden NICHT erneut versendet"
-echo "  - Es werden 84 Videos verarbeitet (ca. 1 Stunde bei 45s pro Video)"
+echo "  - Alle Zusammenfassungen werden als ein Message Batch eingereicht"
+echo "    (Ergebnis meist innerhalb einer Stunde, halber Token-Preis)"
 echo "  - Claude API wird verwendet (kostenpflichtig)"
 echo ""
 read -p "Möchtest du fortfahren? (j/n): " -n 1 -r
@@ -24,4 +25,4 @@ echo ""
 echo "🚀 Starte Nachbearbeitung im Docker Container..."
 echo ""
 
-docker compose exec youtube-summarizer python3 backfill_videos.py
+docker compose exec youtube-summarizer python3 backfill_videos.py --yes --batch
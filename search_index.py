@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Persistent full-text index over video titles, channels, summaries and transcripts
+Uses SQLite FTS5 with BM25 ranking
+"""
+
+import hashlib
+import html
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+SEARCH_DB_FILE = Path('/data/search.db')
+
+# Column weights for bm25(): video_id (not indexed), title, summary, transcript, channel
+BM25_WEIGHTS = (0.0, 10.0, 4.0, 1.0, 6.0)
+
+# Bump when the indexed columns change, the index is then rebuilt from the store
+SCHEMA_VERSION = 2
+
+# Markers used in snippets, replaced with <mark> after HTML escaping
+_HIT_START = '\x02'
+_HIT_END = '\x03'
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\w+)(\*?)')
+_WORD = re.compile(r'\w+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id           INTEGER PRIMARY KEY,
+    video_id     TEXT UNIQUE NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# unicode61 with remove_diacritics folds umlauts (über = uber), porter stems English words.
+# New columns go at the end, snippet() refers to transcript by its position.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+    video_id UNINDEXED,
+    title,
+    summary,
+    transcript,
+    channel,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+)
+"""
+
+
+def build_match_query(query):
+    """Turn user input into a safe FTS5 MATCH expression.
+
+    "quoted words" become phrase queries, word* becomes a prefix query and the
+    last word is always matched as a prefix so the search works while typing.
+    Returns None if the input contains no searchable words.
+    """
+    terms = []
+    for phrase, word, star in _QUERY_TOKEN.findall(query):
+        if phrase:
+            words = _WORD.findall(phrase)
+            if words:
+                terms.append('"' + ' '.join(words) + '"')
+        elif word:
+            terms.append(f'"{word}"' + ('*' if star else ''))
+
+    if not terms:
+        return None
+
+    # Search-as-you-type: an unfinished last word matches as a prefix
+    if not query.rstrip().endswith('"') and not terms[-1].endswith('*'):
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _content_hash(record):
+    key = '\x00'.join([
+        record.get('title') or '',
+        record.get('channel') or '',
+        record.get('summary') or '',
+        record.get('transcript_ref') or '',
+    ])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _render_snippet(snippet):
+    """Escape snippet text and turn hit markers into <mark> tags"""
+    escaped = html.escape(snippet or '')
+    return escaped.replace(_HIT_START, '<mark>').replace(_HIT_END, '</mark>')
+
+
+def match_offset(text, transcript_match):
+    """Character offset of the first hit of a raw transcript snippet within the full text
+
+    The snippet is a verbatim excerpt of the text (plus markers and ellipses),
+    so locating it once gives the exact position of the highlighted term.
+    """
+    if not transcript_match or _HIT_START not in transcript_match:
+        return None
+    excerpt = transcript_match.strip('…')
+    hit = excerpt.index(_HIT_START)
+    plain = excerpt.replace(_HIT_START, '').replace(_HIT_END, '')
+    position = text.find(plain)
+    if position < 0:
+        return None
+    return position + hit
+
+
+class SearchIndex:
+    """Inverted index kept in sync with the state store"""
+
+    def __init__(self, db_path=SEARCH_DB_FILE):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.conn.executescript(SCHEMA)
+        self._migrate_schema()
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _migrate_schema(self):
+        """Create the FTS table; drop an index with outdated columns so the next sync rebuilds it"""
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+            if row is None or int(row[0]) < SCHEMA_VERSION:
+                conn.execute('DROP TABLE IF EXISTS videos_fts')
+                conn.execute('DELETE FROM docs')
+                conn.execute("INSERT INTO meta (key, value) VALUES ('schema', ?) "
+                             "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (str(SCHEMA_VERSION),))
+                self._bump_version(conn)
+            conn.execute(FTS_SCHEMA)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+    def version(self):
+        """Change counter of the index, incremented by every update"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    @staticmethod
+    def _bump_version(conn):
+        conn.execute("INSERT INTO meta (key, value) VALUES ('version', '1') "
+                     "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+    def _write(self, conn, video_id, record, transcript):
+        row = conn.execute('SELECT id FROM docs WHERE video_id = ?', (video_id,)).fetchone()
+        if row:
+            doc_id = row[0]
+            conn.execute('DELETE FROM videos_fts WHERE rowid = ?', (doc_id,))
+            conn.execute('UPDATE docs SET content_hash = ? WHERE id = ?', (_content_hash(record), doc_id))
+        else:
+            doc_id = conn.execute('INSERT INTO docs (video_id, content_hash) VALUES (?, ?)',
+                                  (video_id, _content_hash(record))).lastrowid
+        conn.execute(
+            'INSERT INTO videos_fts (rowid, video_id, title, summary, transcript, channel) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (doc_id, video_id, record.get('title') or '', record.get('summary') or '', transcript or '',
+             record.get('channel') or '')
+        )
+
+    def update(self, store, video_id):
+        """(Re-)index one video from the state store"""
+        record = store.get(video_id)
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if record is None:
+                self._remove(conn, video_id)
+            else:
+                self._write(conn, video_id, record, store.load_transcript(record))
+            self._bump_version(conn)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def _remove(conn, video_id):
+        row = conn.execute('SELECT id FROM docs WHERE video_id = ?', (video_id,)).fetchone()
+        if row:
+            conn.execute('DELETE FROM videos_fts WHERE rowid = ?', (row[0],))
+            conn.execute('DELETE FROM docs WHERE id = ?', (row[0],))
+
+    def sync(self, store):
+        """Index all new or changed videos and drop deleted ones. Returns the number of changes."""
+        records = store.all()
+        indexed = dict(self.conn.execute('SELECT video_id, content_hash FROM docs'))
+
+        changed = [video_id for video_id, record in records.items()
+                   if indexed.get(video_id) != _content_hash(record)]
+        deleted = [video_id for video_id in indexed if video_id not in records]
+        if not changed and not deleted:
+            return 0
+
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for video_id in changed:
+                record = records[video_id]
+                self._write(conn, video_id, record, store.load_transcript(record))
+            for video_id in deleted:
+                self._remove(conn, video_id)
+            self._bump_version(conn)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+        print(f"🔎 Suchindex aktualisiert: {len(changed)} neu/geändert, {len(deleted)} entfernt")
+        return len(changed) + len(deleted)
+
+    def matching_ids(self, query):
+        """Set of video IDs matching a query (unranked, for filtering lists)"""
+        match = build_match_query(query)
+        if match is None:
+            return set()
+        try:
+            rows = self.conn.execute('SELECT video_id FROM videos_fts WHERE videos_fts MATCH ?', (match,))
+            return {row[0] for row in rows}
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  Ungültige Suchanfrage '{query}': {e}")
+            return set()
+
+    def search(self, query, limit=20, offset=0):
+        """Ranked search. Returns (total, hits) where hits are dicts with
+        video_id, score, an HTML snippet with <mark>-highlighted matches and the
+        raw transcript excerpt of the first transcript match (see match_offset)."""
+        match = build_match_query(query)
+        if match is None:
+            return 0, []
+
+        try:
+            total = self.conn.execute(
+                'SELECT COUNT(*) FROM videos_fts WHERE videos_fts MATCH ?', (match,)
+            ).fetchone()[0]
+            rows = self.conn.execute(
+                f"""
+                SELECT video_id,
+                       bm25(videos_fts, {', '.join(map(str, BM25_WEIGHTS))}) AS score,
+                       snippet(videos_fts, -1, ?, ?, '…', 24) AS snippet,
+                       snippet(videos_fts, 3, ?, ?, '…', 8) AS transcript_match
+                FROM videos_fts
+                WHERE videos_fts MATCH ?
+                ORDER BY score
+                LIMIT ? OFFSET ?
+                """,
+                (_HIT_START, _HIT_END, _HIT_START, _HIT_END, match, limit, offset)
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  Ungültige Suchanfrage '{query}': {e}")
+            return 0, []
+
+        hits = [{
+            'video_id': video_id,
+            # bm25() is negative, smaller is better; flip it for readability
+            'score': round(-score, 4),
+            'snippet': _render_snippet(snippet),
+            'transcript_match': transcript_match if transcript_match and _HIT_START in transcript_match else None,
+        } for video_id, score, snippet, transcript_match in rows]
+        return total, hits
@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed state store for processed videos
+Shared by the summarizer worker and the web interface
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from blob_store import BlobStore, BLOB_DIR
+from summary_render import render_fields
+from timed_transcript import TimedTranscript
+
+DB_FILE = Path('/data/state.db')
+LEGACY_STATE_FILE = Path('/data/processed_videos.json')
+
+# Fields stored as real columns, everything else goes into the JSON `extra` column.
+# The transcript text itself lives in the blob store, records only keep a reference.
+COLUMNS = (
+    'title', 'channel', 'thumbnail', 'processed_at', 'added_at',
+    'status', 'summary', 'transcript_ref', 'transcript_chars',
+)
+
+
+def _move_transcripts_to_blobs(store, conn):
+    """Migration: move inline transcripts into the blob store"""
+    conn.execute('ALTER TABLE videos ADD COLUMN transcript_ref TEXT')
+    conn.execute('ALTER TABLE videos ADD COLUMN transcript_chars INTEGER')
+    rows = conn.execute("SELECT video_id, transcript FROM videos WHERE transcript IS NOT NULL").fetchall()
+    for row in rows:
+        transcript = row['transcript']
+        conn.execute(
+            'UPDATE videos SET transcript_ref = ?, transcript_chars = ? WHERE video_id = ?',
+            (store.blobs.put(transcript) if transcript else None, len(transcript), row['video_id'])
+        )
+    conn.execute('ALTER TABLE videos DROP COLUMN transcript')
+    moved = sum(1 for row in rows if row['transcript'])
+    if moved:
+        print(f"📦 {moved} Transkripte in den Blob-Store verschoben")
+
+
+# Schema migrations, applied in order and tracked via PRAGMA user_version
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS videos (
+        video_id     TEXT PRIMARY KEY,
+        title        TEXT,
+        channel      TEXT,
+        thumbnail    TEXT,
+        processed_at TEXT,
+        added_at     TEXT,
+        status       TEXT NOT NULL DEFAULT 'active',
+        summary      TEXT,
+        transcript   TEXT,
+        extra        TEXT,
+        updated_at   TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_videos_status ON videos(status);
+    CREATE INDEX IF NOT EXISTS idx_videos_added_at ON videos(added_at);
+    CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos(channel);
+    CREATE TABLE IF NOT EXISTS meta (
+        key   TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """,
+    _move_transcripts_to_blobs,
+    """
+    CREATE TABLE IF NOT EXISTS summary_progress (
+        video_id      TEXT PRIMARY KEY,
+        title         TEXT,
+        state         TEXT NOT NULL,
+        text          TEXT NOT NULL DEFAULT '',
+        max_tokens    INTEGER,
+        note          TEXT,
+        started_at    TEXT,
+        updated_at    REAL NOT NULL
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id              INTEGER PRIMARY KEY AUTOINCREMENT,
+        video_id        TEXT NOT NULL,
+        title           TEXT NOT NULL,
+        html            TEXT NOT NULL,
+        status          TEXT NOT NULL DEFAULT 'pending',
+        attempts        INTEGER NOT NULL DEFAULT 0,
+        last_error      TEXT,
+        created_at      TEXT NOT NULL,
+        next_attempt_at REAL NOT NULL DEFAULT 0,
+        sent_at         TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox(status, next_attempt_at);
+    """,
+    # Date the dashboard sorts and pages by (added to playlist, else processed)
+    """
+    ALTER TABLE videos ADD COLUMN sort_at TEXT
+        GENERATED ALWAYS AS (COALESCE(NULLIF(added_at, ''), NULLIF(processed_at, ''), '')) VIRTUAL;
+    CREATE INDEX IF NOT EXISTS idx_videos_status_sort ON videos(status, sort_at, video_id);
+    """,
+    # Append-only log of every change to a video, trimmed by compact()
+    """
+    CREATE TABLE IF NOT EXISTS journal (
+        seq      INTEGER PRIMARY KEY AUTOINCREMENT,
+        at       TEXT NOT NULL,
+        pid      INTEGER NOT NULL,
+        video_id TEXT NOT NULL,
+        op       TEXT NOT NULL,
+        fields   TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_journal_video ON journal(video_id, seq);
+    """,
+]
+
+# Every field a record can have: columns, the generated sort_at, updated_at
+# and the fields kept in `extra`. Projections (page(fields=...)) only accept these.
+RECORD_FIELDS = COLUMNS + (
+    'video_id', 'sort_at', 'updated_at',
+    'duration_seconds', 'enriched_at', 'prompt_version', 'timing_ref',
+    'summary_html', 'summary_preview_html', 'summary_html_key',
+)
+
+# Derived from the summary, not worth repeating in the journal
+UNJOURNALED_FIELDS = ('summary_html', 'summary_preview_html')
+
+# Fields of a dashboard/archive card, pages never load the rest of the record
+CARD_FIELDS = ('title', 'channel', 'sort_at', 'duration_seconds', 'summary_preview_html')
+
+_FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Columns of the summary_progress table (partial summaries while Claude is writing)
+PROGRESS_COLUMNS = ('title', 'state', 'text', 'max_tokens', 'note', 'started_at')
+
+
+def _field_expr(field):
+    """SQL expression for a field (column or extra field)"""
+    if not _FIELD_NAME.match(field):
+        raise ValueError(f"Invalid field name: {field!r}")
+    if field in COLUMNS or field in ('sort_at', 'updated_at'):
+        return field
+    return f"json_extract(extra, '$.{field}')"
+
+
+class StateStore:
+    """Per-record access to the processed videos state"""
+
+    def __init__(self, db_path=DB_FILE, legacy_file=LEGACY_STATE_FILE, blob_dir=BLOB_DIR):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.blobs = BlobStore(blob_dir)
+        self._local = threading.local()
+        self._migrate_schema()
+        self.migrate_from_json(legacy_file)
+
+    @property
+    def conn(self):
+        """One connection per thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            # WAL lets the web app read while the worker writes
+            conn.execute('PRAGMA journal_mode=WAL')
+            # fsync on every commit: a committed change survives a crash or power loss
+            conn.execute('PRAGMA synchronous=FULL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            # Every write bumps the version so readers can cheaply detect changes
+            conn.execute("INSERT INTO meta (key, value) VALUES ('version', '1') "
+                         "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _migrate_schema(self):
+        with self._transaction() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+                if callable(migration):
+                    migration(self, conn)
+                else:
+                    for statement in migration.split(';'):
+                        if statement.strip():
+                            conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {number}')
+
+    def migrate_from_json(self, legacy_file=LEGACY_STATE_FILE):
+        """One-shot import of the old processed_videos.json (list or dict format)"""
+        legacy_file = Path(legacy_file)
+        if not legacy_file.exists() or self.get_meta('migrated_from_json'):
+            return 0
+
+        try:
+            with open(legacy_file, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            # Imported and renamed by the other process in the meantime
+            return 0
+
+        # Handle old format (list of IDs) vs new format (dict with details)
+        if isinstance(data, list):
+            data = {video_id: {} for video_id in data}
+
+        with self._transaction() as conn:
+            # Worker and web app start at the same time; only the first one imports
+            if self.get_meta('migrated_from_json'):
+                return 0
+            for video_id, record in data.items():
+                self._upsert(conn, video_id, record or {})
+            self._set_meta(conn, 'migrated_from_json', datetime.now().isoformat())
+
+        try:
+            legacy_file.rename(legacy_file.with_name(legacy_file.name + '.migrated'))
+        except FileNotFoundError:
+            pass
+        print(f"📦 {len(data)} Videos aus {legacy_file.name} in die Datenbank übernommen")
+        return len(data)
+
+    @staticmethod
+    def _row_to_record(row):
+        record = json.loads(row['extra']) if row['extra'] else {}
+        for column in COLUMNS:
+            if row[column] is not None:
+                record[column] = row[column]
+        return record
+
+    @staticmethod
+    def _journal(conn, video_id, op, fields=None):
+        if fields is not None:
+            fields = json.dumps({key: value for key, value in fields.items() if key not in UNJOURNALED_FIELDS},
+                                ensure_ascii=False)
+        conn.execute('INSERT INTO journal (at, pid, video_id, op, fields) VALUES (?, ?, ?, ?, ?)',
+                     (datetime.now().isoformat(), os.getpid(), video_id, op, fields))
+
+    def _upsert(self, conn, video_id, record, defaults=None):
+        if defaults and conn.execute('SELECT 1 FROM videos WHERE video_id = ?', (video_id,)).fetchone() is None:
+            record = dict(defaults, **record)
+        if 'segments' in record:
+            # Timed segments: the text becomes the transcript, the timings a compact blob
+            record = dict(record)
+            timed = TimedTranscript.from_segments(record.pop('segments') or [])
+            record['transcript'] = timed.text
+            record['timing_ref'] = self.blobs.put_bytes(timed.to_bytes()) if len(timed) else None
+        if 'summary' in record:
+            # Rendered once here, page views only emit the stored HTML
+            record = dict(record, **render_fields(record['summary']))
+        if 'transcript' in record:
+            record = dict(record)
+            transcript = record.pop('transcript') or ''
+            record['transcript_ref'] = self.blobs.put(transcript) if transcript else None
+            record['transcript_chars'] = len(transcript)
+
+        columns = {key: value for key, value in record.items() if key in COLUMNS}
+        extra = {key: value for key, value in record.items() if key not in COLUMNS}
+
+        row = conn.execute('SELECT extra FROM videos WHERE video_id = ?', (video_id,)).fetchone()
+        if row is None:
+            columns['extra'] = json.dumps(extra, ensure_ascii=False) if extra else None
+            columns['updated_at'] = datetime.now().isoformat()
+            names = ', '.join(['video_id'] + list(columns))
+            placeholders = ', '.join('?' * (len(columns) + 1))
+            conn.execute(f'INSERT INTO videos ({names}) VALUES ({placeholders})',
+                         [video_id] + list(columns.values()))
+            self._journal(conn, video_id, 'insert', record)
+            return
+
+        # Merge: only the given fields change, e.g. a status set via the web app survives
+        if extra:
+            merged = json.loads(row['extra']) if row['extra'] else {}
+            merged.update(extra)
+            columns['extra'] = json.dumps(merged, ensure_ascii=False)
+        columns['updated_at'] = datetime.now().isoformat()
+        assignments = ', '.join(f'{name} = ?' for name in columns)
+        conn.execute(f'UPDATE videos SET {assignments} WHERE video_id = ?',
+                     list(columns.values()) + [video_id])
+        self._journal(conn, video_id, 'update', record)
+
+    def upsert(self, video_id, record, mail=None, defaults=None):
+        """Insert a video or update the given fields of an existing one
+
+        defaults are only used when the video is new, e.g. {'status': 'active'}
+        so a status set in the web app meanwhile is not overwritten.
+        mail={'title', 'html'} queues an email in the outbox in the same
+        transaction, so a saved video never loses its email and vice versa.
+        """
+        with self._transaction() as conn:
+            self._upsert(conn, video_id, record, defaults)
+            if mail:
+                conn.execute(
+                    'INSERT INTO outbox (video_id, title, html, created_at) VALUES (?, ?, ?, ?)',
+                    (video_id, mail['title'], mail['html'], datetime.now().isoformat())
+                )
+
+    def get(self, video_id):
+        """Return the record for a video, or None"""
+        row = self.conn.execute('SELECT * FROM videos WHERE video_id = ?', (video_id,)).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def all(self, status=None):
+        """Return {video_id: record}, optionally filtered by status"""
+        if status is None:
+            rows = self.conn.execute('SELECT * FROM videos')
+        else:
+            rows = self.conn.execute('SELECT * FROM videos WHERE status = ?', (status,))
+        return {row['video_id']: self._row_to_record(row) for row in rows}
+
+    def load_transcript(self, record):
+        """Load the full transcript text of a record from the blob store"""
+        ref = record.get('transcript_ref')
+        if not ref:
+            return ''
+        return self.blobs.get(ref) or ''
+
+    def load_timing(self, record):
+        """TimedTranscript (columns + transcript text) of a record, or None if no timings are stored"""
+        ref = record.get('timing_ref')
+        data = self.blobs.get_bytes(ref) if ref else None
+        if not data:
+            return None
+        return TimedTranscript.from_bytes(data, self.load_transcript(record))
+
+    def ids(self):
+        """Return the set of all known video IDs"""
+        return {row[0] for row in self.conn.execute('SELECT video_id FROM videos')}
+
+    def ids_missing(self, field):
+        """IDs of videos where a field (column or extra field) is not set"""
+        expr = _field_expr(field)
+        rows = self.conn.execute(f"SELECT video_id FROM videos WHERE {expr} IS NULL OR {expr} = ''")
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _page_filter(status, ids=None, since=None):
+        """WHERE clause for a status (None, one or a list), a set of IDs and a minimum updated_at"""
+        where, params = [], []
+        if isinstance(status, str):
+            where.append('status = ?')
+            params.append(status)
+        elif status is not None:
+            where.append('status IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(status)))
+        if ids is not None:
+            where.append('video_id IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(ids)))
+        if since:
+            where.append('updated_at >= ?')
+            params.append(since)
+        return ' AND '.join(where) or '1', params
+
+    def page(self, status=None, limit=50, cursor=None, fields=None, ids=None, since=None):
+        """One page of videos, newest first (keyset pagination)
+
+        cursor is the (sort_at, video_id) of the last video of the previous page,
+        ids optionally restricts the page to a set of video IDs (e.g. search hits),
+        since to videos changed at or after an ISO timestamp.
+        Returns (records, next_cursor); with fields (names from RECORD_FIELDS) the
+        records only hold video_id and these fields. next_cursor is None on the last page.
+        """
+        where, params = self._page_filter(status, ids, since)
+        if cursor:
+            sort_at, video_id = cursor
+            where += ' AND (sort_at < ? OR (sort_at = ? AND video_id < ?))'
+            params += [sort_at, sort_at, video_id]
+        if fields is None:
+            select = ', *'
+        else:
+            unknown = set(fields) - set(RECORD_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+            # Quoted, so field names like "order" are not read as SQL keywords
+            select = ''.join(f', {_field_expr(field)} AS "{field}"' for field in fields if field != 'video_id')
+        rows = self.conn.execute(
+            f"SELECT video_id, sort_at AS page_sort_at{select} FROM videos WHERE {where} "
+            f"ORDER BY sort_at DESC, video_id DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1]['page_sort_at'], rows[-1]['video_id'])
+        if fields is None:
+            records = [dict(self._row_to_record(row), video_id=row['video_id']) for row in rows]
+        else:
+            records = [{key: row[key] for key in row.keys() if key != 'page_sort_at' and row[key] is not None}
+                       for row in rows]
+        return records, next_cursor
+
+    def iter_pages(self, status=None, fields=None, since=None, page_size=500):
+        """All matching records, newest first, reading one page at a time"""
+        cursor = None
+        while True:
+            records, cursor = self.page(status, limit=page_size, cursor=cursor, fields=fields, since=since)
+            yield from records
+            if cursor is None:
+                return
+
+    def count_by_day(self, status, ids=None):
+        """Number of videos with a status per day ('YYYY-MM-DD', '' for unknown dates)"""
+        where, params = self._page_filter(status, ids)
+        return dict(self.conn.execute(
+            f"SELECT substr(sort_at, 1, 10) AS day, COUNT(*) FROM videos WHERE {where} GROUP BY day",
+            params
+        ).fetchall())
+
+    def count_by_status(self):
+        return dict(self.conn.execute('SELECT status, COUNT(*) FROM videos GROUP BY status').fetchall())
+
+    def disk_usage(self):
+        """Size in bytes of the database file and its WAL"""
+        usage = {}
+        for name, path in (('db', self.db_path), ('wal', self.db_path.with_name(self.db_path.name + '-wal'))):
+            try:
+                usage[name] = path.stat().st_size
+            except FileNotFoundError:
+                usage[name] = 0
+        return usage
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM videos').fetchone()[0]
+
+    def set_status(self, video_id, status):
+        """Change the status of one video. Returns False if the video is unknown."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE videos SET status = ?, updated_at = ? WHERE video_id = ?',
+                (status, datetime.now().isoformat(), video_id)
+            )
+            if cursor.rowcount:
+                self._journal(conn, video_id, 'status', {'status': status})
+        return cursor.rowcount > 0
+
+    def set_status_bulk(self, status, ids=None, channel=None, date_from=None, date_to=None, current_status=None):
+        """Change the status of many videos in one transaction
+
+        Selects by a list of IDs and/or a filter: channel, date range
+        (inclusive 'YYYY-MM-DD' on the added/processed date) and current status.
+        Returns the IDs that were changed.
+        """
+        where, params = [], []
+        if ids is not None:
+            where.append('video_id IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(ids)))
+        if channel:
+            where.append('channel = ?')
+            params.append(channel)
+        if date_from:
+            where.append('substr(sort_at, 1, 10) >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('substr(sort_at, 1, 10) <= ?')
+            params.append(date_to)
+        if current_status:
+            where.append('status = ?')
+            params.append(current_status)
+        if not where:
+            raise ValueError("set_status_bulk needs IDs or a filter")
+
+        with self._transaction() as conn:
+            changed = [row[0] for row in conn.execute(
+                f"UPDATE videos SET status = ?, updated_at = ? "
+                f"WHERE status != ? AND {' AND '.join(where)} RETURNING video_id",
+                [status, datetime.now().isoformat(), status] + params
+            ).fetchall()]
+            for video_id in changed:
+                self._journal(conn, video_id, 'status', {'status': status})
+        return changed
+
+    def set_progress(self, video_id, **fields):
+        """Update the live progress of a summary that is being written
+
+        Not a versioned write: progress changes every second and must not
+        invalidate the caches of the web app.
+        """
+        fields = {key: value for key, value in fields.items() if key in PROGRESS_COLUMNS}
+        fields['updated_at'] = time.time()
+        if 'state' in fields:
+            # Setting the state (re)starts or finishes an entry
+            names = ', '.join(['video_id'] + list(fields))
+            placeholders = ', '.join('?' * (len(fields) + 1))
+            assignments = ', '.join(f'{name} = excluded.{name}' for name in fields)
+            self.conn.execute(
+                f'INSERT INTO summary_progress ({names}) VALUES ({placeholders}) '
+                f'ON CONFLICT(video_id) DO UPDATE SET {assignments}',
+                [video_id] + list(fields.values())
+            )
+        else:
+            assignments = ', '.join(f'{name} = ?' for name in fields)
+            self.conn.execute(f'UPDATE summary_progress SET {assignments} WHERE video_id = ?',
+                              list(fields.values()) + [video_id])
+
+    def get_progress(self, video_id):
+        """Return the live progress of a summary ({'state', 'text', ...}), or None"""
+        row = self.conn.execute('SELECT * FROM summary_progress WHERE video_id = ?', (video_id,)).fetchone()
+        return dict(row) if row else None
+
+    def clear_progress(self, video_id):
+        self.conn.execute('DELETE FROM summary_progress WHERE video_id = ?', (video_id,))
+
+    def due_mails(self):
+        """Queued emails that are ready to be (re)sent, oldest first"""
+        rows = self.conn.execute(
+            "SELECT id, video_id, title, html, attempts FROM outbox "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id",
+            (time.time(),)
+        )
+        return [dict(row) for row in rows]
+
+    def mark_mails_sent(self, mail_ids):
+        placeholders = ', '.join('?' * len(mail_ids))
+        self.conn.execute(
+            f"UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id IN ({placeholders})",
+            [datetime.now().isoformat()] + list(mail_ids)
+        )
+
+    def mark_mails_failed(self, mail_ids, error, retry_at, max_attempts):
+        """Record a failed delivery; mails are given up after max_attempts"""
+        placeholders = ', '.join('?' * len(mail_ids))
+        self.conn.execute(
+            f"""
+            UPDATE outbox SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?,
+                   status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+            WHERE id IN ({placeholders})
+            """,
+            [error, retry_at, max_attempts] + list(mail_ids)
+        )
+
+    def outbox_counts(self):
+        """Number of queued emails per status"""
+        return dict(self.conn.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status').fetchall())
+
+    def history(self, video_id, limit=50):
+        """Latest journal entries of a video, newest first"""
+        rows = self.conn.execute(
+            'SELECT seq, at, pid, op, fields FROM journal WHERE video_id = ? ORDER BY seq DESC LIMIT ?',
+            (video_id, limit)
+        )
+        return [dict(row, fields=json.loads(row['fields']) if row['fields'] else None) for row in rows]
+
+    def compact(self, keep_days=90):
+        """Trim the journal and sent emails and fold the WAL back into the database file
+
+        Returns the number of journal entries removed.
+        """
+        cutoff = (datetime.now() - timedelta(days=keep_days)).isoformat()
+        removed = self.conn.execute('DELETE FROM journal WHERE at < ?', (cutoff,)).rowcount
+        # Delivered emails are only kept for a while, each holds a full rendered body
+        sent = self.conn.execute("DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?", (cutoff,)).rowcount
+        # TRUNCATE resets the WAL file; skipped (busy) while a reader still needs old pages
+        busy, _, _ = self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        if removed:
+            print(f"🧹 Journal: {removed} Einträge älter als {keep_days} Tage entfernt")
+        if sent:
+            print(f"🧹 Outbox: {sent} versendete Emails älter als {keep_days} Tage entfernt")
+        if busy:
+            print("⚠️  WAL-Checkpoint übersprungen (Datenbank in Benutzung)")
+        return removed
+
+    def version(self):
+        """Change counter, incremented by every write from any process"""
+        return int(self.get_meta('version', 0))
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute('INSERT INTO meta (key, value) VALUES (?, ?) '
+                     'ON CONFLICT(key) DO UPDATE SET value = excluded.value', (key, value))
+
+    def set_meta(self, key, value):
+        with self._transaction() as conn:
+            self._set_meta(conn, key, value)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for Claude summaries
+Keyed by a hash of the prompt version and the full request (model, max_tokens, prompt)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SUMMARY_CACHE_FILE = Path('/data/summary_cache.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    key            TEXT PRIMARY KEY,
+    prompt_version INTEGER NOT NULL,
+    model          TEXT NOT NULL,
+    summary        TEXT NOT NULL,
+    created_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_prompt_version ON summaries(prompt_version);
+CREATE TABLE IF NOT EXISTS stats (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+class SummaryCache:
+    """Avoids paying twice for the same summary (backfill reruns, retries after a crash, ...)"""
+
+    def __init__(self, db_path=SUMMARY_CACHE_FILE):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(prompt_version, params):
+        """Hash of prompt version, model, max_tokens and the full prompt (title + transcript)"""
+        payload = json.dumps({'prompt_version': prompt_version, 'params': params},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _count(self, name):
+        self.conn.execute('INSERT INTO stats (name, value) VALUES (?, 1) '
+                          'ON CONFLICT(name) DO UPDATE SET value = value + 1', (name,))
+
+    def get(self, key):
+        """Return the cached summary, or None"""
+        row = self.conn.execute('SELECT summary FROM summaries WHERE key = ?', (key,)).fetchone()
+        self._count('hits' if row else 'misses')
+        return row[0] if row else None
+
+    def put(self, key, prompt_version, model, summary):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO summaries (key, prompt_version, model, summary, created_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key, prompt_version, model, summary, time.time())
+        )
+
+    def invalidate(self, prompt_version=None, keep_version=None):
+        """Delete entries of one prompt version, or of every version except keep_version"""
+        if prompt_version is not None:
+            cursor = self.conn.execute('DELETE FROM summaries WHERE prompt_version = ?', (prompt_version,))
+        elif keep_version is not None:
+            cursor = self.conn.execute('DELETE FROM summaries WHERE prompt_version != ?', (keep_version,))
+        else:
+            cursor = self.conn.execute('DELETE FROM summaries')
+        if cursor.rowcount:
+            print(f"🧹 Summary-Cache: {cursor.rowcount} veraltete Einträge entfernt")
+        return cursor.rowcount
+
+    def stats(self):
+        counters = dict(self.conn.execute('SELECT name, value FROM stats'))
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        by_version = dict(self.conn.execute(
+            'SELECT prompt_version, COUNT(*) FROM summaries GROUP BY prompt_version'))
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            'entries': sum(by_version.values()),
+            'entries_by_prompt_version': by_version,
+        }
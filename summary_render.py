@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Shared summary renderer (simple markdown / plain-text headings -> HTML)
+Used for the web interface and the emails. Summaries are rendered once when
+they are saved; the stored HTML is keyed by a hash of summary and renderer version.
+"""
+
+import hashlib
+import re
+
+# Bump when the output changes, stored HTML is then re-rendered on the next start
+RENDERER_VERSION = 1
+
+# Dashboard cards show the beginning of the summary
+PREVIEW_CHARS = 200
+
+THEMES = {
+    'web': {
+        'h3': '<h3 style="color: #f1f1f1; margin-top: 20px; margin-bottom: 10px; font-size: 18px;">',
+        'h4': '<h4 style="color: #ccc; margin-top: 15px; margin-bottom: 8px; font-size: 16px;">',
+        'caps': '<h3 style="color: #ff0000; margin-top: 20px; margin-bottom: 10px; font-size: 16px;">',
+        'p': '<p style="margin: 8px 0; line-height: 1.6;">',
+    },
+    'email': {
+        'h3': '<h3 style="color: #333; margin-top: 20px; margin-bottom: 10px;">',
+        'h4': '<h4 style="color: #555; margin-top: 15px; margin-bottom: 8px;">',
+        'caps': '<h3 style="color: #FF0000; margin-top: 20px; margin-bottom: 10px; font-size: 16px;">',
+        'p': '<p style="margin: 8px 0;">',
+    },
+}
+
+_UL = '<ul style="margin: 10px 0; padding-left: 20px;">'
+_LI = '<li style="margin: 5px 0;">'
+
+# **bold** and *italic* in one pass
+_INLINE = re.compile(r'\*\*([^*]+)\*\*|\*([^*]+)\*')
+# "## Title", "# Title" or a GROSSBUCHSTABEN heading (whole line)
+_HEADING = re.compile(r'## (?P<h4>.+)|# (?P<h3>.+)|(?P<caps>[A-ZÄÖÜ][A-ZÄÖÜ\s]+)')
+
+
+def _inline_replace(match):
+    if match.group(1) is not None:
+        return f'<strong>{match.group(1)}</strong>'
+    return f'<em>{match.group(2)}</em>'
+
+
+def _inline(text):
+    return _INLINE.sub(_inline_replace, text) if '*' in text else text
+
+
+def render(text, theme='web'):
+    """Convert a summary to HTML in a single pass over its lines"""
+    styles = THEMES[theme]
+    html_lines = []
+    in_list = False
+
+    for line in text.split('\n'):
+        stripped = line.strip()
+        # Listen (Zeilen die mit - beginnen)
+        if stripped.startswith('- '):
+            if not in_list:
+                html_lines.append(_UL)
+                in_list = True
+            html_lines.append(f'{_LI}{_inline(stripped[2:])}</li>')
+            continue
+
+        if in_list:
+            html_lines.append('</ul>')
+            in_list = False
+
+        if not stripped:
+            html_lines.append('<br>')
+            continue
+
+        heading = _HEADING.fullmatch(line)
+        if heading:
+            kind = heading.lastgroup
+            tag = 'h4' if kind == 'h4' else 'h3'
+            html_lines.append(f'{styles[kind]}{_inline(heading.group(kind))}</{tag}>')
+        elif stripped.startswith('<'):  # Bereits HTML
+            html_lines.append(line)
+        else:
+            html_lines.append(f"{styles['p']}{_inline(line)}</p>")
+
+    if in_list:
+        html_lines.append('</ul>')
+
+    return '\n'.join(html_lines)
+
+
+def summary_key(summary):
+    """Hash of summary text and renderer version, identifies stored HTML"""
+    return hashlib.sha256(f"{RENDERER_VERSION}\x00{summary}".encode('utf-8')).hexdigest()[:16]
+
+
+def render_fields(summary):
+    """Record fields with the pre-rendered HTML of a summary (stored at write time)"""
+    summary = summary or ''
+    return {
+        'summary_html': render(summary),
+        'summary_preview_html': render(summary[:PREVIEW_CHARS] + '...') if summary else '',
+        'summary_html_key': summary_key(summary),
+    }
+
+
+def cached_html(record, preview=False):
+    """Stored HTML of a record's summary; rendered on the fly only if it is missing or stale"""
+    summary = record.get('summary') or ''
+    field = 'summary_preview_html' if preview else 'summary_html'
+    if field in record and record.get('summary_html_key') == summary_key(summary):
+        return record[field]
+    return render_fields(summary)[field]
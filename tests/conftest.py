@@ -0,0 +1,133 @@
+import email
+import email.policy
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import web_app
+from search_index import SearchIndex
+from state_store import StateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StateStore(tmp_path / 'state.db', tmp_path / 'processed_videos.json', tmp_path / 'blobs')
+
+
+@pytest.fixture
+def client(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(web_app, '_store', store)
+    monkeypatch.setattr(web_app, '_search_index', SearchIndex(tmp_path / 'search.db'))
+    monkeypatch.setattr(web_app, 'day_counts_cache', web_app.DayCountCache())
+    monkeypatch.setattr(web_app, 'load_credentials', lambda: True)
+    return web_app.app.test_client()
+
+
+class StubServer:
+    """Local HTTP server answering each request with handler(method, path, body) -> (status, headers, body)"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                stub.requests.append((self.command, self.path))
+                status, headers, payload = stub.handler(self.command, self.path, body)
+                payload = payload.encode('utf-8') if isinstance(payload, str) else payload
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(payload)
+
+            do_GET = do_HEAD = do_POST = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Start local stub servers: stub_server(handler) -> StubServer"""
+    servers = []
+
+    def start(handler):
+        servers.append(StubServer(handler))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+class SmtpStub:
+    """Minimal local SMTP server (no TLS, no auth) that keeps the received messages
+
+    Set `reject` to the number of following MAIL commands to refuse with 451.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.reject = 0
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode('ascii') + b'\r\n')
+
+            def handle(self):
+                stub.connections += 1
+                self.reply('220 stub ESMTP')
+                for line in self.rfile:
+                    command = line.decode('ascii', 'replace').strip().split(' ', 1)[0].upper()
+                    if command == 'EHLO':
+                        self.reply('250-stub')
+                        self.reply('250 8BITMIME')
+                    elif command == 'MAIL' and stub.reject:
+                        stub.reject -= 1
+                        self.reply('451 try again later')
+                    elif command == 'DATA':
+                        self.reply('354 end with .')
+                        data = b''.join(iter(self.rfile.readline, b'.\r\n'))
+                        stub.messages.append(email.message_from_bytes(data, policy=email.policy.default))
+                        self.reply('250 queued')
+                    elif command == 'QUIT':
+                        self.reply('221 bye')
+                        return
+                    else:  # HELO, MAIL, RCPT, RSET, NOOP
+                        self.reply('250 OK')
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def smtp_server():
+    server = SmtpStub()
+    yield server
+    server.close()
@@ -0,0 +1,146 @@
+import json
+
+import anthropic
+import pytest
+
+from search_index import SearchIndex
+from summary_cache import SummaryCache
+from transcript_cache import TranscriptCache
+from youtube_summarizer import PROMPT_VERSION, YouTubeSummarizer
+
+TRANSCRIPTS = {
+    'a': 'Erstes Video über Produktivität. ' * 20,
+    'b': 'Zweites Video über Kochen. ' * 20,
+    'c': 'Drittes Video über Reisen. ' * 20,
+}
+
+
+class BatchApi:
+    """Local stand-in for the Message Batches endpoints (CLAUDE_BASE_URL)
+
+    A batch ends after its second poll; `outcomes` maps custom_id to a result
+    type other than 'succeeded'.
+    """
+
+    def __init__(self, stub_server):
+        self.batches = {}
+        self.outcomes = {}
+        self.server = stub_server(self.handle)
+        self.url = self.server.url
+
+    def batch(self, batch_id):
+        entry = self.batches[batch_id]
+        ended = entry['polls'] >= 2
+        done = len(entry['requests']) if ended else 0
+        return {
+            'id': batch_id, 'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': {'processing': len(entry['requests']) - done, 'succeeded': done,
+                               'errored': 0, 'canceled': 0, 'expired': 0},
+            'created_at': '2026-01-01T00:00:00Z', 'expires_at': '2026-01-02T00:00:00Z',
+            'ended_at': '2026-01-01T01:00:00Z' if ended else None,
+            'archived_at': None, 'cancel_initiated_at': None,
+            'results_url': f'{self.url}/v1/messages/batches/{batch_id}/results' if ended else None,
+        }
+
+    def result(self, request):
+        outcome = self.outcomes.get(request['custom_id'], 'succeeded')
+        if outcome == 'succeeded':
+            result = {'type': 'succeeded', 'message': {
+                'id': 'msg_' + request['custom_id'], 'type': 'message', 'role': 'assistant',
+                'model': request['params']['model'], 'stop_reason': 'end_turn', 'stop_sequence': None,
+                'content': [{'type': 'text', 'text': f"Zusammenfassung {request['custom_id']}"}],
+                'usage': {'input_tokens': 100, 'output_tokens': 20}}}
+        elif outcome == 'errored':
+            result = {'type': 'errored', 'error': {
+                'type': 'error', 'error': {'type': 'overloaded_error', 'message': 'Overloaded'}}}
+        else:
+            result = {'type': outcome}
+        return {'custom_id': request['custom_id'], 'result': result}
+
+    def handle(self, method, path, body):
+        parts = path.split('?')[0].strip('/').split('/')
+        if method == 'POST' and parts == ['v1', 'messages', 'batches']:
+            batch_id = f'msgbatch_{len(self.batches) + 1}'
+            self.batches[batch_id] = {'requests': json.loads(body)['requests'], 'polls': 0}
+            return 200, {'Content-Type': 'application/json'}, json.dumps(self.batch(batch_id))
+        batch_id = parts[3] if len(parts) > 3 else None
+        if batch_id not in self.batches:
+            return 404, {'Content-Type': 'application/json'}, json.dumps(
+                {'type': 'error', 'error': {'type': 'not_found_error', 'message': 'Batch not found'}})
+        if len(parts) == 5 and parts[4] == 'results':
+            lines = [json.dumps(self.result(request)) for request in self.batches[batch_id]['requests']]
+            return 200, {'Content-Type': 'application/binary'}, '\n'.join(lines) + '\n'
+        self.batches[batch_id]['polls'] += 1
+        return 200, {'Content-Type': 'application/json'}, json.dumps(self.batch(batch_id))
+
+
+@pytest.fixture
+def api(stub_server):
+    return BatchApi(stub_server)
+
+
+@pytest.fixture
+def summarizer(store, tmp_path, api):
+    """A YouTubeSummarizer without YouTube: a fixed playlist and transcripts, Claude at the stand-in"""
+    summarizer = YouTubeSummarizer.__new__(YouTubeSummarizer)
+    summarizer.claude_client = anthropic.Anthropic(api_key='test', base_url=api.url, max_retries=0)
+    summarizer.store = store
+    summarizer.search_index = SearchIndex(tmp_path / 'search.db')
+    summarizer.transcript_cache = TranscriptCache(tmp_path / 'transcripts.db')
+    summarizer.summary_cache = SummaryCache(tmp_path / 'summaries.db')
+    summarizer.transcript_workers = 2
+    summarizer.batch_poll_seconds = 0
+
+    playlist = [{'id': video_id, 'title': f'Video {video_id.upper()}', 'channel': 'Kanal',
+                 'added_at': '2026-01-01T00:00:00Z'} for video_id in 'abcd']
+    summarizer.get_watch_later_videos = lambda full=False: playlist
+    summarizer.get_transcript = TRANSCRIPTS.get
+    for video in playlist:
+        store.upsert(video['id'], {'title': video['title'], 'status': 'active'})
+    return summarizer
+
+
+def test_backfill_with_batch(summarizer, api, store):
+    api.outcomes = {'b': 'errored', 'c': 'expired'}
+    summarizer.backfill_with_batch()
+
+    # One batch with the videos that have a transcript, polled until it ended
+    [(batch_id, batch)] = api.batches.items()
+    assert sorted(request['custom_id'] for request in batch['requests']) == ['a', 'b', 'c']
+    assert batch['polls'] >= 2
+
+    # Results are mapped back by custom_id
+    assert store.get('a')['summary'] == 'Zusammenfassung a'
+    assert store.get('a')['prompt_version'] == PROMPT_VERSION
+    # Errored and expired videos keep their transcript but no summary, so the next backfill retries them
+    for video_id in 'bc':
+        assert 'summary' not in store.get(video_id)
+        assert store.load_transcript(store.get(video_id)) == TRANSCRIPTS[video_id]
+    assert store.get('d')['summary'] == 'Kein Transkript verfügbar'
+    assert store.get_meta('backfill_batch_id') == ''
+
+    # The next run only submits what is still missing
+    api.outcomes = {}
+    summarizer.backfill_with_batch()
+    assert sorted(request['custom_id'] for request in api.batches['msgbatch_2']['requests']) == ['b', 'c']
+    assert [store.get(video_id)['summary'] for video_id in 'abc'] == [
+        'Zusammenfassung a', 'Zusammenfassung b', 'Zusammenfassung c']
+
+
+def test_resumes_a_stored_batch(summarizer, api, store):
+    batch_id = summarizer.submit_backfill_batch()
+    assert store.get_meta('backfill_batch_id') == batch_id
+
+    # After a restart the stored batch is picked up instead of submitting a new one
+    summarizer.backfill_with_batch()
+    assert list(api.batches) == [batch_id]
+    assert store.get('a')['summary'] == 'Zusammenfassung a'
+
+
+def test_resubmits_when_the_stored_batch_is_gone(summarizer, api, store):
+    store.set_meta('backfill_batch_id', 'msgbatch_expired')
+    summarizer.backfill_with_batch()
+    assert list(api.batches) == ['msgbatch_1']
+    assert store.get('a')['summary'] == 'Zusammenfassung a'
+    assert store.get_meta('backfill_batch_id') == ''
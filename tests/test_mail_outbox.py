@@ -0,0 +1,64 @@
+import pytest
+
+from mail_outbox import MailOutbox, SmtpConnection
+
+
+@pytest.fixture
+def outbox(store, smtp_server):
+    # SMTP_SERVER / SMTP_STARTTLS=false in production point at a stand-in like this one
+    connection = SmtpConnection('127.0.0.1', smtp_server.port, 'bot@example.com', None, starttls=False)
+    yield MailOutbox(store, connection, 'bot@example.com', 'me@example.com')
+    connection.close()
+
+
+def queue(store, video_id, title):
+    store.upsert(video_id, {'title': title, 'status': 'active'},
+                 mail={'title': title, 'html': f'<h2>{title}</h2>'})
+
+
+def test_delivers_over_one_connection(store, outbox, smtp_server):
+    queue(store, 'a', 'Video A')
+    queue(store, 'b', 'Video B')
+    assert outbox.drain() == 2
+    assert [message['Subject'] for message in smtp_server.messages] == [
+        '📺 YouTube Zusammenfassung: Video A', '📺 YouTube Zusammenfassung: Video B']
+    assert smtp_server.connections == 1
+    assert store.outbox_counts() == {'sent': 2}
+    assert outbox.drain() == 0
+
+
+def test_failed_delivery_is_retried_later(store, outbox, smtp_server):
+    queue(store, 'a', 'Video A')
+    smtp_server.reject = 1
+    assert outbox.drain() == 0
+    assert smtp_server.messages == []
+    # Backed off: nothing is due until the retry time
+    assert store.due_mails() == []
+    assert outbox.drain() == 0
+
+    store.conn.execute('UPDATE outbox SET next_attempt_at = 0')
+    assert outbox.drain() == 1
+    assert len(smtp_server.messages) == 1
+    assert store.outbox_counts() == {'sent': 1}
+
+
+def test_gives_up_after_max_attempts(store, outbox, smtp_server, monkeypatch):
+    monkeypatch.setattr('mail_outbox.MAX_ATTEMPTS', 2)
+    queue(store, 'a', 'Video A')
+    smtp_server.reject = 2
+    for _ in range(2):
+        store.conn.execute('UPDATE outbox SET next_attempt_at = 0')
+        assert outbox.drain() == 0
+    assert store.outbox_counts() == {'failed': 1}
+
+
+def test_digest_combines_all_due_videos(store, outbox, smtp_server):
+    outbox.digest = True
+    for video_id in 'abc':
+        queue(store, video_id, f'Video {video_id.upper()}')
+    assert outbox.drain() == 3
+    assert len(smtp_server.messages) == 1
+    message = smtp_server.messages[0]
+    assert message['Subject'] == '📺 YouTube Zusammenfassungen: 3 neue Videos'
+    html = message.get_body(('html',)).get_content()
+    assert all(f'<h2>Video {name}</h2>' in html for name in 'ABC')
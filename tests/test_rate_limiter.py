@@ -0,0 +1,85 @@
+import json
+from types import SimpleNamespace
+
+import anthropic
+import pytest
+
+from rate_limiter import RateGovernor, is_retryable
+from youtube_summarizer import YouTubeSummarizer
+
+
+def status_error(status_code, error_type):
+    # Only the attributes the SDK reads from the HTTP response
+    response = SimpleNamespace(status_code=status_code, request=None, headers={})
+    body = {'type': 'error', 'error': {'type': error_type, 'message': error_type}}
+    return anthropic.APIStatusError(error_type, response=response, body=body)
+
+
+def test_http_status_errors():
+    assert is_retryable(status_error(429, 'rate_limit_error'))
+    assert is_retryable(status_error(529, 'overloaded_error'))
+    assert is_retryable(status_error(500, 'api_error'))
+    assert not is_retryable(status_error(400, 'invalid_request_error'))
+
+
+def test_stream_error_event_is_retryable():
+    # An `error` event mid-stream raises APIStatusError with the stream's status 200
+    for error_type in ('overloaded_error', 'rate_limit_error', 'api_error'):
+        assert is_retryable(status_error(200, error_type))
+    assert not is_retryable(status_error(200, 'invalid_request_error'))
+
+
+def test_stream_overload_pauses_all_threads():
+    governor = RateGovernor(base_backoff=0.01, max_backoff=0.01)
+    governor.backoff(status_error(200, 'overloaded_error'), 0)
+    assert governor.stats['rate_limited'] == 1
+    governor.backoff(status_error(200, 'api_error'), 0)
+    assert governor.stats['rate_limited'] == 1
+
+
+def sse(*events):
+    return ''.join(f'event: {event["type"]}\ndata: {json.dumps(event)}\n\n' for event in events)
+
+
+MESSAGE_START = {'type': 'message_start', 'message': {
+    'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'model': 'claude-test', 'content': [],
+    'stop_reason': None, 'stop_sequence': None, 'usage': {'input_tokens': 20, 'output_tokens': 1}}}
+
+OVERLOADED = sse(MESSAGE_START, {'type': 'error', 'error': {'type': 'overloaded_error', 'message': 'Overloaded'}})
+
+SUCCESS = sse(
+    MESSAGE_START,
+    {'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}},
+    {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': 'SCHNELL'}},
+    {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': 'ÜBERSICHT'}},
+    {'type': 'content_block_stop', 'index': 0},
+    {'type': 'message_delta', 'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+     'usage': {'output_tokens': 5}},
+    {'type': 'message_stop'},
+)
+
+
+@pytest.fixture
+def summarizer(stub_server):
+    """A YouTubeSummarizer with only the Claude parts, talking to a local stand-in (CLAUDE_BASE_URL)"""
+    responses = [OVERLOADED, SUCCESS]
+
+    def handler(method, path, body):
+        assert path == '/v1/messages' and json.loads(body)['stream'] is True
+        return 200, {'Content-Type': 'text/event-stream'}, responses.pop(0)
+
+    api = stub_server(handler)
+    summarizer = YouTubeSummarizer.__new__(YouTubeSummarizer)
+    summarizer.claude_client = anthropic.Anthropic(api_key='test', base_url=api.url, max_retries=0)
+    summarizer.rate_governor = RateGovernor(base_backoff=0.01, max_backoff=0.01)
+    summarizer.claude_max_retries = 3
+    summarizer.api = api
+    return summarizer
+
+
+def test_stream_error_event_is_retried(summarizer):
+    message = summarizer.create_message(model='claude-test', max_tokens=100,
+                                        messages=[{'role': 'user', 'content': 'Hallo'}])
+    assert message.content[0].text == 'SCHNELLÜBERSICHT'
+    assert len(summarizer.api.requests) == 2
+    assert summarizer.rate_governor.stats['rate_limited'] == 1
@@ -0,0 +1,32 @@
+import sqlite3
+
+from search_index import SearchIndex
+
+
+def test_channel_is_searchable(store, tmp_path):
+    store.upsert('a', {'title': 'Produktivität', 'channel': 'Ali Abdaal', 'status': 'active'})
+    store.upsert('b', {'title': 'Kochen', 'channel': 'Koch TV', 'status': 'active'})
+    index = SearchIndex(tmp_path / 'search.db')
+    index.sync(store)
+    assert index.matching_ids('abdaal') == {'a'}
+    assert index.matching_ids('Koch TV') == {'b'}
+
+
+def test_index_without_channel_column_is_rebuilt(store, tmp_path):
+    path = tmp_path / 'search.db'
+    conn = sqlite3.connect(str(path))
+    conn.executescript("""
+        CREATE TABLE docs (id INTEGER PRIMARY KEY, video_id TEXT UNIQUE NOT NULL, content_hash TEXT NOT NULL);
+        CREATE VIRTUAL TABLE videos_fts USING fts5(video_id UNINDEXED, title, summary, transcript);
+        INSERT INTO docs (id, video_id, content_hash) VALUES (1, 'a', 'old');
+        INSERT INTO videos_fts (rowid, video_id, title, summary, transcript) VALUES (1, 'a', 'Alt', '', '');
+    """)
+    conn.close()
+
+    store.upsert('a', {'title': 'Neu', 'channel': 'Kanal', 'status': 'active'})
+    index = SearchIndex(path)
+    assert index.count() == 0
+    index.sync(store)
+    assert index.matching_ids('kanal') == {'a'}
+    # Opening it again keeps the rebuilt index
+    assert SearchIndex(path).count() == 1
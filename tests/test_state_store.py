@@ -0,0 +1,51 @@
+import json
+
+from state_store import StateStore
+
+
+def test_legacy_json_is_imported_once_when_processes_race(tmp_path, monkeypatch):
+    legacy = tmp_path / 'processed_videos.json'
+    legacy.write_text(json.dumps({'a': {'title': 'A'}}))
+    first = StateStore(tmp_path / 'state.db', legacy, tmp_path / 'blobs')
+    assert first.ids() == {'a'} and not legacy.exists()
+
+    # The second process checked the flag before the first one committed
+    legacy.write_text(json.dumps({'a': {'title': 'A'}, 'b': {'title': 'B'}}))
+    get_meta = StateStore.get_meta
+    checks = []
+
+    def stale_first_check(self, key, default=None):
+        checks.append(key)
+        return None if len(checks) == 1 else get_meta(self, key, default)
+
+    monkeypatch.setattr(StateStore, 'get_meta', stale_first_check)
+    second = StateStore(tmp_path / 'state.db', legacy, tmp_path / 'blobs')
+    assert second.ids() == {'a'}
+    assert checks[:2] == ['migrated_from_json', 'migrated_from_json']
+
+
+def test_legacy_json_renamed_by_other_process(tmp_path, monkeypatch):
+    legacy = tmp_path / 'processed_videos.json'
+    legacy.write_text(json.dumps(['a', 'b']))
+    rename = type(legacy).rename
+
+    def renamed_elsewhere(self, target):
+        # The other process renames it first, ours then finds nothing to rename
+        rename(self, target)
+        return rename(self, target)
+
+    monkeypatch.setattr(type(legacy), 'rename', renamed_elsewhere)
+    store = StateStore(tmp_path / 'state.db', legacy, tmp_path / 'blobs')
+    assert store.ids() == {'a', 'b'}
+
+
+def test_compact_removes_old_sent_emails(store):
+    for video_id in 'abc':
+        store.upsert(video_id, {'title': video_id}, mail={'title': video_id, 'html': '<p>' + 'x' * 1000 + '</p>'})
+    old, recent, pending = [mail['id'] for mail in store.due_mails()]
+    store.mark_mails_sent([old, recent])
+    store.conn.execute("UPDATE outbox SET sent_at = '2000-01-01T00:00:00' WHERE id = ?", (old,))
+
+    store.compact(keep_days=90)
+    assert store.outbox_counts() == {'sent': 1, 'pending': 1}
+    assert [mail['id'] for mail in store.due_mails()] == [pending]
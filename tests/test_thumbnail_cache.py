@@ -0,0 +1,53 @@
+import pytest
+
+from thumbnail_cache import ThumbnailCache
+
+JPEG = b'\xff\xd8\xff\xe0' + b'x' * 1000
+
+
+@pytest.fixture
+def origin(stub_server):
+    """Serves mqdefault, hqdefault and default; maxres/sd are missing like for many real videos"""
+    def handler(method, path, body):
+        if path.rsplit('/', 1)[-1] in ('mqdefault.jpg', 'hqdefault.jpg', 'default.jpg'):
+            return 200, {'Content-Type': 'image/jpeg'}, JPEG
+        return 404, {}, b''
+    return stub_server(handler)
+
+
+def test_get_falls_back_to_the_next_rendition(tmp_path, origin):
+    cache = ThumbnailCache(tmp_path / 'thumbs.db', origin=origin.url)
+    entry = cache.get('abc', 'large')
+    assert entry['rendition'] == 'hqdefault' and entry['data'] == JPEG
+    assert origin.requests == [('GET', '/vi/abc/maxresdefault.jpg'), ('GET', '/vi/abc/sddefault.jpg'),
+                               ('GET', '/vi/abc/hqdefault.jpg')]
+    # Second call is served locally
+    assert cache.get('abc', 'large')['data'] == JPEG
+    assert len(origin.requests) == 3
+
+
+def test_get_remembers_videos_without_thumbnail(tmp_path, stub_server):
+    origin = stub_server(lambda method, path, body: (404, {}, b''))
+    cache = ThumbnailCache(tmp_path / 'thumbs.db', origin=origin.url)
+    assert cache.get('gone', 'medium')['data'] is None
+    assert cache.get('gone', 'medium')['data'] is None
+    assert len(origin.requests) == 2  # mqdefault, default; then cached
+
+
+def test_source_url_probes_without_downloading(tmp_path, origin):
+    cache = ThumbnailCache(tmp_path / 'thumbs.db', origin=origin.url)
+    assert cache.source_url('abc') == f'{origin.url}/vi/abc/hqdefault.jpg'
+    assert {method for method, path in origin.requests} == {'HEAD'}
+    assert cache.stats()['bytes'] == 0
+    # The resolved rendition is cached
+    cache.source_url('abc')
+    assert len(origin.requests) == 3
+
+
+def test_source_url_falls_back_when_origin_fails(tmp_path, stub_server):
+    origin = stub_server(lambda method, path, body: (503, {}, b''))
+    cache = ThumbnailCache(tmp_path / 'thumbs.db', origin=origin.url)
+    assert cache.source_url('abc') == f'{origin.url}/vi/abc/hqdefault.jpg'
+    # Errors are not cached
+    cache.source_url('abc')
+    assert len(origin.requests) == 2
@@ -0,0 +1,102 @@
+import pytest
+
+import web_app
+
+
+@pytest.fixture
+def videos(store):
+    for i, (channel, added_at) in enumerate([('A', '2024-01-05T10:00:00'), ('A', '2024-02-05T10:00:00'),
+                                             ('B', '2024-03-05T10:00:00')]):
+        store.upsert(f'v{i}', {'title': f'Video {i}', 'channel': channel, 'status': 'active', 'added_at': added_at})
+    return store
+
+
+def test_bulk_status_by_filter(client, videos):
+    response = client.post('/api/videos/status', json={
+        'status': 'archived', 'filter': {'channel': 'A', 'from': '2024-02-01', 'to': '2024-12-31'}})
+    assert response.get_json()['ids'] == ['v1']
+    assert videos.get('v1')['status'] == 'archived'
+
+
+@pytest.mark.parametrize('selection', [
+    {'from': 2030},               # numbers sort before any text in SQLite
+    {'from': '2024-1-5'},         # not ISO, would compare as a string
+    {'to': 'tomorrow'},
+    {'channel': ['A']},
+    {'status': 'gone'},
+    {'form': '2024-01-01'},
+    {},
+    {'channel': ''},
+])
+def test_bulk_status_rejects_bad_filter(client, videos, selection):
+    response = client.post('/api/videos/status', json={'status': 'archived', 'filter': selection})
+    assert response.status_code == 400
+    assert all(video['status'] == 'active' for video in videos.all().values())
+
+
+def test_api_videos_projection(client, videos):
+    response = client.get('/api/videos?fields=title,updated_at,sort_at&limit=2')
+    data = response.get_json()
+    assert [video['video_id'] for video in data['videos']] == ['v2', 'v1']
+    assert set(data['videos'][0]) == {'video_id', 'title', 'updated_at', 'sort_at'}
+    assert data['next_cursor']
+
+
+@pytest.mark.parametrize('fields', ['order', 'title,group', 'select', 'nonexistent', 'title;drop'])
+def test_api_videos_rejects_unknown_fields(client, videos, fields):
+    response = client.get(f'/api/videos?fields={fields}')
+    assert response.status_code == 400
+
+
+def test_conditional_get_uses_the_etag_only(client, videos):
+    first = client.get('/api/videos')
+    assert first.headers['ETag'] and 'Last-Modified' not in first.headers
+    assert client.get('/api/videos', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    videos.upsert('v3', {'title': 'Video 3', 'status': 'active'})
+    assert client.get('/api/videos', headers={'If-None-Match': first.headers['ETag']}).status_code == 200
+    # Without an ETag there is nothing to compare, If-Modified-Since never yields a stale 304
+    assert client.get('/api/videos', headers={
+        'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'}).status_code == 200
+
+
+def test_day_counts_are_computed_once_per_store_version(client, store, monkeypatch):
+    for i in range(30):
+        store.upsert(f'x{i:02d}', {'title': 'T', 'status': 'active', 'added_at': f'2024-05-{1 + i % 28:02d}T10:00:00'})
+    monkeypatch.setattr('web_app.PAGE_SIZE', 10)
+    calls = []
+    count_by_day = store.count_by_day
+    monkeypatch.setattr(store, 'count_by_day', lambda *args: calls.append(args) or count_by_day(*args))
+
+    cursor, pages = None, 0
+    while True:
+        data = client.get('/api/video-cards', query_string={'cursor': cursor} if cursor else {}).get_json()
+        assert data['total'] == 30
+        pages += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert pages == 3 and len(calls) == 1
+
+    store.upsert('new', {'title': 'T', 'status': 'active', 'added_at': '2024-05-02T10:00:00'})
+    assert client.get('/api/video-cards').get_json()['total'] == 31
+    assert len(calls) == 2
+
+
+def test_filter_box_matches_the_channel(client, videos):
+    web_app.get_search_index().sync(videos)
+    data = client.get('/api/video-cards', query_string={'q': 'B'}).get_json()
+    assert data['total'] == 1 and 'Video 2' in data['html']
+
+
+def test_detail_and_search_read_only_their_records(client, videos, monkeypatch):
+    web_app.get_search_index().sync(videos)
+    monkeypatch.setattr(videos, 'all', lambda *args: pytest.fail('full state loaded'))
+
+    assert b'Video 1' in client.get('/video/v1').data
+    assert client.get('/video/unknown').status_code == 404
+
+    response = client.get('/api/search?q=Video')
+    assert response.headers['X-Total-Count'] == '3'
+    assert {hit['id'] for hit in response.get_json()} == {'v0', 'v1', 'v2'}
+    assert response.get_json()[0].keys() >= {'title', 'channel', 'status', 'thumbnail', 'url'}
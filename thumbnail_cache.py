@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for video thumbnails
+Each image is fetched from YouTube once and then served locally; size-capped
+with LRU eviction. Variants map to the renditions YouTube already serves, so
+nothing has to be decoded or resized here.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+THUMBNAIL_CACHE_FILE = Path('/data/thumbnail_cache.db')
+THUMBNAIL_ORIGIN = 'https://i.ytimg.com'
+
+# Renditions per variant, best first (maxresdefault is missing for many videos)
+VARIANTS = {
+    'small': ('default',),                                              # 120x90
+    'medium': ('mqdefault', 'default'),                                 # 320x180, dashboard cards
+    'large': ('maxresdefault', 'sddefault', 'hqdefault', 'mqdefault'),  # emails
+}
+
+# Videos without any thumbnail are asked for again after this long
+MISSING_TTL_SECONDS = 86400
+# last_used is only written when it is older than this (a hit is then a pure read)
+TOUCH_INTERVAL_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS thumbnails (
+    video_id   TEXT NOT NULL,
+    variant    TEXT NOT NULL,
+    rendition  TEXT,
+    data       BLOB,
+    size       INTEGER NOT NULL,
+    etag       TEXT,
+    fetched_at REAL NOT NULL,
+    last_used  REAL NOT NULL,
+    PRIMARY KEY (video_id, variant)
+);
+CREATE INDEX IF NOT EXISTS idx_thumbnails_last_used ON thumbnails(last_used);
+CREATE TABLE IF NOT EXISTS renditions (
+    video_id   TEXT NOT NULL,
+    variant    TEXT NOT NULL,
+    rendition  TEXT,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (video_id, variant)
+);
+"""
+
+
+class ThumbnailCache:
+    """JPEG thumbnails per (video_id, variant); a row without data marks a video without thumbnail"""
+
+    def __init__(self, db_path=THUMBNAIL_CACHE_FILE, origin=THUMBNAIL_ORIGIN, ttl_days=30, max_mb=100, timeout=10):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.origin = origin.rstrip('/')
+        self.ttl_seconds = ttl_days * 86400
+        self.max_bytes = max_mb * 1024 * 1024
+        self.timeout = timeout
+        self._local = threading.local()
+        self.conn.executescript(SCHEMA)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # One fetch per image, concurrent requests for it wait for the first one
+        self._fetch_locks = {}
+        self._fetch_locks_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            # THUMBNAIL_ORIGIN allows pointing at a local stand-in for testing
+            origin=os.getenv('THUMBNAIL_ORIGIN') or THUMBNAIL_ORIGIN,
+            ttl_days=float(os.getenv('THUMBNAIL_CACHE_TTL_DAYS', '30')),
+            max_mb=float(os.getenv('THUMBNAIL_CACHE_MAX_MB', '100')),
+        )
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def origin_url(self, video_id, rendition):
+        return f'{self.origin}/vi/{video_id}/{rendition}.jpg'
+
+    def _lookup(self, video_id, variant, now):
+        row = self.conn.execute(
+            'SELECT rendition, data, etag, fetched_at, last_used FROM thumbnails WHERE video_id = ? AND variant = ?',
+            (video_id, variant)
+        ).fetchone()
+        if row is None:
+            return None
+        rendition, data, etag, fetched_at, last_used = row
+        ttl = self.ttl_seconds if data is not None else MISSING_TTL_SECONDS
+        if fetched_at <= now - ttl:
+            return None
+        if last_used <= now - TOUCH_INTERVAL_SECONDS:
+            self.conn.execute('UPDATE thumbnails SET last_used = ? WHERE video_id = ? AND variant = ?',
+                              (now, video_id, variant))
+        return {'rendition': rendition, 'data': data, 'etag': etag}
+
+    def get(self, video_id, variant='medium'):
+        """Return {'rendition', 'data', 'etag'} (data None if the video has no thumbnail).
+
+        Fetches from the origin on a miss. Raises requests.RequestException if
+        the origin cannot be reached (nothing is cached then).
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown thumbnail variant: {variant}")
+
+        entry = self._lookup(video_id, variant, time.time())
+        if entry is not None:
+            return entry
+
+        with self._fetch_locks_lock:
+            lock = self._fetch_locks.setdefault((video_id, variant), threading.Lock())
+        with lock:
+            # Another thread (or process) may have fetched it while we waited
+            entry = self._lookup(video_id, variant, time.time())
+            if entry is None:
+                entry = self._fetch(video_id, variant)
+        with self._fetch_locks_lock:
+            self._fetch_locks.pop((video_id, variant), None)
+        return entry
+
+    def source_url(self, video_id, variant='large'):
+        """Origin URL of the best existing rendition (for emails, which need a public URL)
+
+        Only the name of the rendition is cached; the image itself is never
+        downloaded, nothing here serves it and it would evict dashboard thumbnails.
+        """
+        try:
+            rendition = self.resolve(video_id, variant)
+        except requests.RequestException as e:
+            print(f"⚠️  Thumbnail für {video_id} nicht erreichbar: {e}")
+            rendition = None
+        # hqdefault exists for every video that has a thumbnail at all
+        return self.origin_url(video_id, rendition or 'hqdefault')
+
+    def resolve(self, video_id, variant):
+        """Name of the best existing rendition of a variant (None if there is none)
+
+        Probes the origin with HEAD requests on a miss. Raises
+        requests.RequestException if the origin cannot be reached.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown thumbnail variant: {variant}")
+
+        now = time.time()
+        row = self.conn.execute(
+            'SELECT rendition, checked_at FROM renditions WHERE video_id = ? AND variant = ?',
+            (video_id, variant)
+        ).fetchone()
+        if row is not None:
+            rendition, checked_at = row
+            ttl = self.ttl_seconds if rendition is not None else MISSING_TTL_SECONDS
+            if checked_at > now - ttl:
+                return rendition
+
+        for rendition in VARIANTS[variant]:
+            response = self.session.head(self.origin_url(video_id, rendition), timeout=self.timeout)
+            if response.status_code == 404:
+                continue
+            response.raise_for_status()
+            break
+        else:
+            rendition = None
+        self.conn.execute('INSERT OR REPLACE INTO renditions (video_id, variant, rendition, checked_at) '
+                          'VALUES (?, ?, ?, ?)', (video_id, variant, rendition, now))
+        return rendition
+
+    def _fetch(self, video_id, variant):
+        for rendition in VARIANTS[variant]:
+            response = self.session.get(self.origin_url(video_id, rendition), timeout=self.timeout)
+            if response.status_code == 404:
+                continue
+            response.raise_for_status()
+            data = response.content
+            entry = {'rendition': rendition, 'data': data, 'etag': hashlib.sha256(data).hexdigest()[:16]}
+            break
+        else:
+            print(f"⚠️  Kein Thumbnail für {video_id} ({variant})")
+            entry = {'rendition': None, 'data': None, 'etag': None}
+        self._put(video_id, variant, entry)
+        return entry
+
+    def _put(self, video_id, variant, entry):
+        now = time.time()
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO thumbnails '
+                '(video_id, variant, rendition, data, size, etag, fetched_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (video_id, variant, entry['rendition'], entry['data'], len(entry['data'] or b''),
+                 entry['etag'], now, now)
+            )
+            self._evict(conn)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM thumbnails').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used images until we are below the limit
+        evicted = 0
+        for video_id, variant, size in conn.execute(
+                'SELECT video_id, variant, size FROM thumbnails ORDER BY last_used').fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM thumbnails WHERE video_id = ? AND variant = ?', (video_id, variant))
+            total -= size
+            evicted += 1
+        print(f"🧹 Thumbnail-Cache: {evicted} alte Bilder entfernt")
+
+    def stats(self):
+        entries, size = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM thumbnails').fetchone()
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
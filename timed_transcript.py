@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Compact, columnar storage of timed transcript segments
+Start times and durations (ms) plus offsets into one text buffer, so a
+character offset (e.g. a search hit) maps to a timestamp with one bisect.
+"""
+
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+
+# Format version and segment count, followed by the three uint32 columns
+_HEADER = struct.Struct('<BI')
+_FORMAT_VERSION = 1
+
+
+def _column(values=()):
+    column = array('I', values)
+    assert column.itemsize == 4
+    return column
+
+
+class TimedTranscript:
+    """Segments of one video as columns: starts[i], durations[i], offsets[i] into `text`"""
+
+    __slots__ = ('starts', 'durations', 'offsets', 'text')
+
+    def __init__(self, starts, durations, offsets, text=''):
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self.text = text
+
+    @classmethod
+    def from_segments(cls, segments):
+        """Build from [{'text', 'start', 'duration'}, ...].
+
+        The text buffer is identical to join_segments(): whitespace collapsed,
+        segments separated by one space, empty segments dropped.
+        """
+        starts, durations, offsets = _column(), _column(), _column()
+        parts = []
+        position = 0
+        for segment in segments:
+            text = re.sub(r'\s+', ' ', segment.get('text') or '').strip()
+            if not text:
+                continue
+            if parts:
+                position += 1  # separating space
+            starts.append(max(0, round(float(segment.get('start') or 0) * 1000)))
+            durations.append(max(0, round(float(segment.get('duration') or 0) * 1000)))
+            offsets.append(position)
+            parts.append(text)
+            position += len(text)
+        return cls(starts, durations, offsets, ' '.join(parts))
+
+    def to_bytes(self):
+        """Serialize the columns (the text is stored separately as the transcript blob)"""
+        columns = [_column(c) for c in (self.starts, self.durations, self.offsets)]
+        if sys.byteorder == 'big':
+            for column in columns:
+                column.byteswap()
+        return _HEADER.pack(_FORMAT_VERSION, len(self.starts)) + b''.join(c.tobytes() for c in columns)
+
+    @classmethod
+    def from_bytes(cls, data, text=''):
+        version, count = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unknown timed transcript format {version}")
+        columns = []
+        position = _HEADER.size
+        for _ in range(3):
+            column = _column()
+            column.frombytes(data[position:position + count * 4])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            columns.append(column)
+            position += count * 4
+        return cls(*columns, text=text)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def index_at(self, offset):
+        """Index of the segment that contains a character offset of the text"""
+        return max(0, bisect_right(self.offsets, offset) - 1)
+
+    def timestamp_at(self, offset):
+        """Start time in seconds of the segment at a character offset, or None"""
+        if not self.starts:
+            return None
+        return self.starts[self.index_at(offset)] // 1000
+
+    def paragraphs(self, seconds=30):
+        """Group the segments into (start seconds, text) blocks of about `seconds` each"""
+        block_start = None
+        for i in range(len(self.starts)):
+            if block_start is None:
+                block_start = i
+            end = self.offsets[i + 1] if i + 1 < len(self.offsets) else len(self.text)
+            last = i + 1 == len(self.starts)
+            if last or self.starts[i + 1] - self.starts[block_start] >= seconds * 1000:
+                yield self.starts[block_start] // 1000, self.text[self.offsets[block_start]:end].strip()
+                block_start = None
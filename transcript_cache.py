@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+On-disk cache for raw transcript segments
+Keyed by (video_id, language, source), with TTL and size-based LRU eviction
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+TRANSCRIPT_CACHE_FILE = Path('/data/transcript_cache.db')
+
+# Preferred languages, in order
+LANGUAGES = ('de', 'en')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    video_id   TEXT NOT NULL,
+    language   TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    segments   BLOB NOT NULL,
+    size       INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_used  REAL NOT NULL,
+    PRIMARY KEY (video_id, language, source)
+);
+CREATE INDEX IF NOT EXISTS idx_transcripts_last_used ON transcripts(last_used);
+"""
+
+
+class TranscriptCache:
+    """Raw timed segments ([{'text', 'start', 'duration'}, ...]) per video"""
+
+    def __init__(self, db_path=TRANSCRIPT_CACHE_FILE, ttl_days=30, max_mb=200):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_days * 86400
+        self.max_bytes = max_mb * 1024 * 1024
+        self._local = threading.local()
+        self.conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            ttl_days=float(os.getenv('TRANSCRIPT_CACHE_TTL_DAYS', '30')),
+            max_mb=float(os.getenv('TRANSCRIPT_CACHE_MAX_MB', '200')),
+        )
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, video_id, languages=LANGUAGES):
+        """Return the freshest cached transcript in the preferred language, or None.
+
+        Result: {'segments', 'language', 'source', 'fetched_at'}
+        """
+        now = time.time()
+        order = ' '.join(f"WHEN ? THEN {i}" for i in range(len(languages)))
+        row = self.conn.execute(
+            f"""
+            SELECT language, source, segments, fetched_at FROM transcripts
+            WHERE video_id = ? AND fetched_at > ?
+            ORDER BY CASE language {order} ELSE {len(languages)} END, fetched_at DESC
+            LIMIT 1
+            """,
+            (video_id, now - self.ttl_seconds, *languages)
+        ).fetchone()
+        if row is None:
+            return None
+
+        language, source, blob, fetched_at = row
+        self.conn.execute(
+            'UPDATE transcripts SET last_used = ? WHERE video_id = ? AND language = ? AND source = ?',
+            (now, video_id, language, source)
+        )
+        return {
+            'segments': json.loads(zlib.decompress(blob)),
+            'language': language,
+            'source': source,
+            'fetched_at': fetched_at,
+        }
+
+    def put(self, video_id, language, source, segments):
+        """Store raw segments and evict old entries if the cache is too big"""
+        now = time.time()
+        blob = zlib.compress(json.dumps(segments, ensure_ascii=False).encode('utf-8'))
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO transcripts '
+                '(video_id, language, source, segments, size, fetched_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (video_id, language or 'unknown', source, blob, len(blob), now, now)
+            )
+            self._evict(conn, now)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _evict(self, conn, now):
+        conn.execute('DELETE FROM transcripts WHERE fetched_at <= ?', (now - self.ttl_seconds,))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM transcripts').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until we are below the limit
+        evicted = 0
+        for video_id, language, source, size in conn.execute(
+                'SELECT video_id, language, source, size FROM transcripts ORDER BY last_used').fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM transcripts WHERE video_id = ? AND language = ? AND source = ?',
+                         (video_id, language, source))
+            total -= size
+            evicted += 1
+        print(f"🧹 Transkript-Cache: {evicted} alte Einträge entfernt")
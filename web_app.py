@@ -9,17 +9,29 @@ import os
 # Allow OAuth over HTTP for local development
 os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
 
+import base64
+import hashlib
 import json
 import pickle
 import re
+import threading
+import time
 from pathlib import Path
-from datetime import datetime, timedelta
-from collections import OrderedDict
-from flask import Flask, render_template, redirect, url_for, session, request, jsonify
+from datetime import date, datetime, timedelta
+from functools import wraps
+from flask import Flask, Response, g, render_template, redirect, url_for, session, request, jsonify, make_response
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 import anthropic
+import requests
+from werkzeug.http import is_resource_modified
+
+from http_compression import compress_response
+import metrics
+from search_index import SearchIndex, match_offset
+from summary_render import cached_html
+from state_store import CARD_FIELDS, RECORD_FIELDS, StateStore
+from thumbnail_cache import VARIANTS, ThumbnailCache
 
 app = Flask(__name__)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -28,60 +40,51 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-product
 SCOPES = ['https://www.googleapis.com/auth/youtube.readonly']
 CREDENTIALS_FILE = Path('/data/credentials.json')
 TOKEN_FILE = Path('/data/token.pickle')
-STATE_FILE = Path('/data/processed_videos.json')
 REDIRECT_URI = os.getenv('REDIRECT_URI', 'http://localhost:5000/oauth2callback')
 
 CLAUDE_API_KEY = os.getenv('CLAUDE_API_KEY')
 
+# Part of every ETag: a restart (e.g. new templates) invalidates the browser caches
+APP_STARTED = time.time()
 
-def markdown_to_html(text):
-    """Convert simple markdown to HTML"""
-    # Ersetze **text** mit <strong>text</strong>
-    text = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', text)
-
-    # Ersetze *text* mit <em>text</em>
-    text = re.sub(r'\*([^*]+)\*', r'<em>\1</em>', text)
-
-    # Ersetze # Überschrift mit <h3>
-    text = re.sub(r'^# (.+)$', r'<h3 style="color: #f1f1f1; margin-top: 20px; margin-bottom: 10px; font-size: 18px;">\1</h3>', text, flags=re.MULTILINE)
-
-    # Ersetze ## Überschrift mit <h4>
-    text = re.sub(r'^## (.+)$', r'<h4 style="color: #ccc; margin-top: 15px; margin-bottom: 8px; font-size: 16px;">\1</h4>', text, flags=re.MULTILINE)
-
-    # Ersetze GROSSBUCHSTABEN-Überschriften
-    text = re.sub(r'^([A-ZÄÖÜ][A-ZÄÖÜ\s]+)$', r'<h3 style="color: #ff0000; margin-top: 20px; margin-bottom: 10px; font-size: 16px;">\1</h3>', text, flags=re.MULTILINE)
-
-    # Verarbeite Listen (Zeilen die mit - beginnen)
-    lines = text.split('\n')
-    html_lines = []
-    in_list = False
-
-    for line in lines:
-        stripped = line.strip()
-        if stripped.startswith('- '):
-            if not in_list:
-                html_lines.append('<ul style="margin: 10px 0; padding-left: 20px;">')
-                in_list = True
-            html_lines.append(f'<li style="margin: 5px 0;">{stripped[2:]}</li>')
-        else:
-            if in_list:
-                html_lines.append('</ul>')
-                in_list = False
-            if stripped == '':
-                html_lines.append('<br>')
-            elif not stripped.startswith('<'):  # Nicht bereits HTML
-                html_lines.append(f'<p style="margin: 8px 0; line-height: 1.6;">{line}</p>')
-            else:
-                html_lines.append(line)
+# Live summary stream: poll interval, keepalive and maximum duration (seconds)
+PROGRESS_POLL_SECONDS = 0.5
+PROGRESS_KEEPALIVE_SECONDS = 15
+PROGRESS_STREAM_TIMEOUT = 900
+
+# Videos per dashboard/archive page (more are loaded while scrolling)
+PAGE_SIZE = int(os.getenv('DASHBOARD_PAGE_SIZE', 48))
+
+# /api/videos: default and maximum page size, allowed field names
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+API_FIELDS = set(RECORD_FIELDS) | {'transcript'}
+
+# Fields of a search result; the refs locate the transcript timing of a hit
+SEARCH_FIELDS = ('title', 'channel', 'processed_at', 'status', 'transcript_ref', 'timing_ref')
+NDJSON_BATCH = 100
+
+# Statuses a video can be set to (dashboard, archive, hidden)
+STATUSES = ('active', 'archived', 'removed')
 
-    if in_list:
-        html_lines.append('</ul>')
+# Browsers may keep thumbnails this long without asking again (seconds)
+THUMBNAIL_MAX_AGE = 7 * 86400
+VIDEO_ID = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
 
-    return '\n'.join(html_lines)
 
+def format_duration(seconds):
+    """Format a duration in seconds as H:MM:SS or M:SS"""
+    if not seconds:
+        return ''
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
 
-# Register the filter for use in templates
-app.jinja_env.filters['markdown_to_html'] = markdown_to_html
+
+# Register the filters for use in templates
+app.jinja_env.filters['format_duration'] = format_duration
 
 
 GERMAN_MONTHS = {
@@ -91,82 +94,207 @@ GERMAN_MONTHS = {
 }
 
 
-def group_videos_by_date(videos):
-    """Group videos by date categories"""
+def date_group(date_str, today):
+    """Date category of a video: Heute, Gestern, Diese Woche, a month or Unbekannt"""
+    if not date_str or date_str == 'N/A':
+        return 'Unbekannt'
+    try:
+        # Parse the date (format: 2024-11-26 10:30:00 or similar)
+        video_date = datetime.fromisoformat(date_str.replace(' ', 'T').split('.')[0][:19]).date()
+    except (ValueError, AttributeError):
+        return 'Unbekannt'
+
+    if video_date == today:
+        return 'Heute'
+    if video_date == today - timedelta(days=1):
+        return 'Gestern'
+    if video_date > today - timedelta(days=7):
+        return 'Diese Woche'
+    # Older videos are grouped by month with German month name
+    return f"{GERMAN_MONTHS[video_date.month]} {video_date.year}"
+
+
+def group_videos_by_date(videos, day_counts):
+    """Group one page of date-sorted videos into [{'name', 'count', 'videos'}]
+
+    The counts come from day_counts ({'YYYY-MM-DD': n} of the whole list), so a
+    group split across pages shows the same total on each of them.
+    """
     today = datetime.now().date()
-    yesterday = today - timedelta(days=1)
-    week_ago = today - timedelta(days=7)
+    totals = {}
+    for day, count in day_counts.items():
+        name = date_group(day, today)
+        totals[name] = totals.get(name, 0) + count
 
-    groups = OrderedDict()
-    groups['Heute'] = []
-    groups['Gestern'] = []
-    groups['Diese Woche'] = []
+    groups = []
+    for video in videos:
+        name = date_group(video['processed_at'], today)
+        if not groups or groups[-1]['name'] != name:
+            groups.append({'name': name, 'count': totals.get(name, 0), 'videos': []})
+        groups[-1]['videos'].append(video)
+    return groups
 
-    # For older videos, group by month
-    monthly_groups = {}
 
-    for video in videos:
-        date_str = video.get('processed_at', '')
-        if not date_str or date_str == 'N/A':
-            # Put videos without date in "Unbekannt"
-            if 'Unbekannt' not in groups:
-                groups['Unbekannt'] = []
-            groups['Unbekannt'].append(video)
-            continue
+def encode_cursor(cursor):
+    """Opaque page token for a (sort_at, video_id) cursor"""
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode('utf-8')).decode('ascii')
 
-        try:
-            # Parse the date (format: 2024-11-26 10:30:00 or similar)
-            video_date = datetime.fromisoformat(date_str.replace(' ', 'T').split('.')[0]).date()
-
-            if video_date == today:
-                groups['Heute'].append(video)
-            elif video_date == yesterday:
-                groups['Gestern'].append(video)
-            elif video_date > week_ago:
-                groups['Diese Woche'].append(video)
-            else:
-                # Group by month with German month name
-                month_name = GERMAN_MONTHS[video_date.month]
-                month_key = f"{month_name} {video_date.year}"
-                sort_key = f"{video_date.year}-{video_date.month:02d}"
-                if month_key not in monthly_groups:
-                    monthly_groups[month_key] = {'videos': [], 'sort_key': sort_key}
-                monthly_groups[month_key]['videos'].append(video)
-        except (ValueError, AttributeError):
-            if 'Unbekannt' not in groups:
-                groups['Unbekannt'] = []
-            groups['Unbekannt'].append(video)
-
-    # Remove empty default groups
-    for key in ['Heute', 'Gestern', 'Diese Woche']:
-        if not groups[key]:
-            del groups[key]
-
-    # Add monthly groups sorted by date (newest first)
-    sorted_months = sorted(monthly_groups.items(),
-                          key=lambda x: x[1]['sort_key'],
-                          reverse=True)
-    for month_name, data in sorted_months:
-        groups[month_name] = data['videos']
 
-    return groups
+def decode_cursor(token):
+    """Inverse of encode_cursor; invalid tokens start from the first page"""
+    if not token:
+        return None
+    try:
+        sort_at, video_id = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        return str(sort_at), str(video_id)
+    except (ValueError, TypeError, UnicodeError):
+        return None
+
+
+_store = None
+_search_index = None
+_thumbnails = None
 
 
-def load_processed_videos():
-    """Load the processed videos state"""
-    if STATE_FILE.exists():
-        with open(STATE_FILE, 'r') as f:
-            data = json.load(f)
-            # Handle old format (list of IDs) vs new format (dict with details)
-            if isinstance(data, list):
-                # Convert old format to new format
-                return {video_id: {} for video_id in data}
-            return data
-    return {}
+def get_store():
+    """Get the shared state store (opened on first use)"""
+    global _store
+    if _store is None:
+        _store = StateStore()
+    return _store
 
 
-def get_youtube_service():
-    """Get authenticated YouTube service"""
+def get_search_index():
+    """Get the full-text index, building it once if it is still empty"""
+    global _search_index
+    if _search_index is None:
+        index = SearchIndex()
+        if index.count() == 0:
+            index.sync(get_store())
+        _search_index = index
+    return _search_index
+
+
+def get_thumbnails():
+    """Get the shared thumbnail cache (opened on first use)"""
+    global _thumbnails
+    if _thumbnails is None:
+        _thumbnails = ThumbnailCache.from_env()
+    return _thumbnails
+
+
+def thumbnail_url(video_id, variant='medium'):
+    return url_for('thumbnail', video_id=video_id, variant=variant)
+
+
+HTTP_SECONDS = metrics.histogram('http_request_seconds', 'Duration of web requests', ['endpoint', 'status'])
+STATE_LOAD_SECONDS = metrics.histogram(
+    'state_load_seconds', 'Duration of reading records from the state store per view', ['view'])
+
+
+def register_metrics():
+    """Live values read from the stores on every scrape"""
+    metrics.gauge('state_videos', 'Videos in the state store by status', ['status'],
+                  function=lambda: {(status,): n for status, n in get_store().count_by_status().items()})
+    metrics.gauge('state_store_bytes', 'Size of the state database files', ['file'],
+                  function=lambda: {(name,): size for name, size in get_store().disk_usage().items()})
+    metrics.gauge('outbox_emails', 'Queued emails by status', ['status'],
+                  function=lambda: {(status,): n for status, n in get_store().outbox_counts().items()})
+    metrics.gauge('search_index_documents', 'Videos in the full-text index',
+                  function=lambda: get_search_index().count())
+    metrics.gauge('thumbnail_cache_bytes', 'Size of the cached thumbnails',
+                  function=lambda: get_thumbnails().stats()['bytes'])
+    metrics.gauge('worker_snapshot_age_seconds', 'Age of the last metrics snapshot of the worker',
+                  function=lambda: metrics.read_snapshot('worker')[1])
+
+
+register_metrics()
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.monotonic()
+
+
+@app.after_request
+def record_request(response):
+    started = g.pop('request_started', None)
+    # Streamed responses (NDJSON, SSE) are measured until the first byte
+    if started is not None:
+        HTTP_SECONDS.observe(time.monotonic() - started,
+                             endpoint=request.endpoint or 'unknown', status=response.status_code)
+    return response
+
+
+class DayCountCache:
+    """Videos per day for each (status, search query), kept until the store or search index changes
+
+    The date headers need counts over the whole list; with this cache paging
+    and infinite scroll run that GROUP BY once per change instead of per page.
+    """
+
+    MAX_ENTRIES = 64
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._counts = {}
+
+    def get(self, store, status, query, ids):
+        # Read the version before the data: a write in between only causes an extra query
+        version = (store.version(), get_search_index().version())
+        key = (status, query)
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._counts = {}
+            counts = self._counts.get(key)
+        if counts is None:
+            counts = store.count_by_day(status, ids)
+            with self._lock:
+                if version == self._version:
+                    if len(self._counts) >= self.MAX_ENTRIES:
+                        self._counts.pop(next(iter(self._counts)))
+                    self._counts[key] = counts
+        return counts
+
+
+day_counts_cache = DayCountCache()
+
+
+def video_card(video_id, data):
+    """Template fields of a dashboard/archive card from a CARD_FIELDS projection"""
+    return {
+        'id': video_id,
+        'title': data.get('title', 'Unknown Title'),
+        'channel': data.get('channel', 'Unknown Channel'),
+        'processed_at': data.get('sort_at') or 'N/A',
+        # Rendered when the summary was saved (see summary_render)
+        'summary_html': data.get('summary_preview_html', ''),
+        'duration': data.get('duration_seconds'),
+        'thumbnail': thumbnail_url(video_id)
+    }
+
+
+def video_page(status, cursor=None, query=''):
+    """One page of cards with a status, newest first, optionally filtered by a search query"""
+    store = get_store()
+    ids = get_search_index().matching_ids(query) if query else None
+    with STATE_LOAD_SECONDS.time(view='page'):
+        records, next_cursor = store.page(status, limit=PAGE_SIZE, cursor=cursor, fields=CARD_FIELDS, ids=ids)
+        day_counts = day_counts_cache.get(store, status, query, ids)
+    videos = [video_card(record['video_id'], record) for record in records]
+    return {
+        'grouped_videos': group_videos_by_date(videos, day_counts),
+        'total': sum(day_counts.values()),
+        'next_cursor': encode_cursor(next_cursor),
+    }
+
+
+def load_credentials():
+    """Load valid YouTube OAuth credentials, or None"""
     if not TOKEN_FILE.exists():
         return None
 
@@ -177,74 +305,85 @@ def get_youtube_service():
         if not creds or not creds.valid:
             return None
 
-        return build('youtube', 'v3', credentials=creds)
+        return creds
     except Exception as e:
         print(f"Error loading credentials: {e}")
         return None
 
 
-@app.route('/')
-def index():
-    """Main dashboard"""
-    youtube = get_youtube_service()
+def conditional(*keys):
+    """Decorator: weak ETag from the state version, 304 while unchanged
 
-    if not youtube:
-        return render_template('login.html')
+    keys are functions of the view arguments returning anything else the
+    response depends on (login, today's date for the date groups, ...).
+    No Last-Modified: a timestamp cannot cover these keys (nor two writes in
+    the same second), so If-Modified-Since alone would get stale 304s.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            parts = [view.__name__, APP_STARTED, get_store().version()] + [key(*args, **kwargs) for key in keys]
+            etag = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
 
-    # Load processed videos
-    processed = load_processed_videos()
+            if not is_resource_modified(request.environ, etag=etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            # Browsers keep the page but ask again every time (answered with 304)
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
 
-    # Get video details (exclude removed videos)
-    videos = []
-    for video_id, data in processed.items():
-        # Skip removed videos
-        if data.get('status') == 'removed':
-            continue
 
-        # Skip archived videos (they go to /archive)
-        if data.get('status') == 'archived':
-            continue
+def logged_in(*args, **kwargs):
+    return load_credentials() is not None
 
-        # If we don't have title, fetch from YouTube
-        if not data.get('title'):
-            try:
-                response = youtube.videos().list(
-                    part='snippet',
-                    id=video_id
-                ).execute()
-
-                if response.get('items'):
-                    snippet = response['items'][0]['snippet']
-                    data['title'] = snippet.get('title', 'Unknown Title')
-                    data['channel'] = snippet.get('channelTitle', 'Unknown Channel')
-                    data['thumbnail'] = snippet.get('thumbnails', {}).get('medium', {}).get('url', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg')
-            except Exception as e:
-                print(f"Error fetching video {video_id}: {e}")
-                data['title'] = 'Unknown Title'
-                data['channel'] = 'Unknown Channel'
-
-        videos.append({
-            'id': video_id,
-            'title': data.get('title', 'Unknown Title'),
-            'channel': data.get('channel', 'Unknown Channel'),
-            'processed_at': data.get('added_at') or data.get('processed_at', 'N/A'),
-            'transcript': data.get('transcript', ''),
-            'summary': data.get('summary', ''),
-            'thumbnail': data.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg')
-        })
 
-    # Sort by added_at date (newest first), fallback to processed_at
-    # Videos without dates go to the end
-    def sort_key(video):
-        date = video.get('processed_at', '')
-        return date if date else '1970-01-01'  # Very old date for videos without timestamp
+def today(*args, **kwargs):
+    return date.today().isoformat()
+
+
+def search_version(*args, **kwargs):
+    return get_search_index().version()
+
+
+def progress_updated_at(video_id):
+    progress = get_store().get_progress(video_id)
+    return progress['updated_at'] if progress else None
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics of the web app and the last snapshot of the worker"""
+    worker, _ = metrics.read_snapshot('worker')
+    return Response(metrics.REGISTRY.render() + worker, mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/healthz')
+def healthz():
+    """Cheap health check for docker/monitoring: one query, no rendering"""
+    try:
+        version = get_store().version()
+    except Exception as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 503
+    return jsonify({'status': 'ok', 'version': version})
 
-    videos.sort(key=sort_key, reverse=True)
 
-    # Group videos by date
-    grouped_videos = group_videos_by_date(videos)
+@app.route('/')
+@conditional(logged_in, today)
+def index():
+    """Main dashboard"""
+    # Metadata is filled in by the worker, pages never call the YouTube API
+    if not load_credentials():
+        return render_template('login.html')
 
-    return render_template('dashboard.html', grouped_videos=grouped_videos, total=len(videos))
+    # Removed and archived videos are not shown on the dashboard
+    page = video_page('active')
+    return render_template('dashboard.html', **page)
 
 
 @app.route('/login')
@@ -311,178 +450,357 @@ def logout():
 
 
 @app.route('/video/<video_id>')
+@conditional(logged_in, progress_updated_at)
 def video_detail(video_id):
     """Show detailed view of a video"""
-    youtube = get_youtube_service()
-    if not youtube:
+    if not load_credentials():
         return redirect(url_for('index'))
 
-    processed = load_processed_videos()
-
-    if video_id not in processed:
-        return "Video not found", 404
+    store = get_store()
+    with STATE_LOAD_SECONDS.time(view='detail'):
+        video = store.get(video_id)
+    # Summary that the worker is writing right now (shown live via /summary-stream)
+    progress = store.get_progress(video_id)
 
-    video = processed[video_id]
-
-    # Fetch video details from YouTube if not cached
-    if not video.get('title'):
-        try:
-            response = youtube.videos().list(
-                part='snippet',
-                id=video_id
-            ).execute()
-
-            if response.get('items'):
-                snippet = response['items'][0]['snippet']
-                video['title'] = snippet.get('title', 'Unknown Title')
-                video['channel'] = snippet.get('channelTitle', 'Unknown Channel')
-                video['thumbnail'] = snippet.get('thumbnails', {}).get('medium', {}).get('url', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg')
-        except Exception as e:
-            print(f"Error fetching video {video_id}: {e}")
-            video['title'] = 'Unknown Title'
-            video['channel'] = 'Unknown Channel'
+    if video is None:
+        if not progress:
+            return "Video not found", 404
+        video = {'title': progress['title'], 'processed_at': progress['started_at']}
 
     video['id'] = video_id
-
-    return render_template('video_detail.html', video=video)
+    # Transcript is only loaded here, on demand, from the blob store
+    timing = store.load_timing(video)
+    if timing:
+        video['transcript'] = timing.text
+        # Blocks of ~30s, each linking to its moment in the video
+        video['transcript_paragraphs'] = list(timing.paragraphs())
+    else:
+        video['transcript'] = store.load_transcript(video)
+
+    video['summary_html'] = cached_html(video)
+
+    # An existing summary is only replaced by the live view while a new one is written
+    show_live = bool(progress) and (progress['state'] == 'summarizing' or not video.get('summary'))
+
+    return render_template('video_detail.html', video=video, progress=progress, show_live=show_live)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route('/api/video/<video_id>/summary-stream')
+def summary_stream(video_id):
+    """Server-sent events with the partial summary while the worker is writing it
+
+    Events: `progress` (new text since the last event, or the full text with
+    reset=true) and `done` (state: done, failed or saved).
+    """
+    store = get_store()
+
+    def generate():
+        sent_text = ''
+        last_update = None
+        last_event = time.monotonic()
+        deadline = last_event + PROGRESS_STREAM_TIMEOUT
+        while time.monotonic() < deadline:
+            progress = store.get_progress(video_id)
+            if progress is None:
+                # Worker saved the record (or there is nothing to stream)
+                yield _sse('done', {'state': 'saved'})
+                return
+
+            if progress['updated_at'] != last_update:
+                last_update = progress['updated_at']
+                text = progress['text']
+                reset = not text.startswith(sent_text)
+                yield _sse('progress', {
+                    'text': text if reset else text[len(sent_text):],
+                    'reset': reset,
+                    'chars': len(text),
+                    'max_tokens': progress['max_tokens'],
+                    'note': progress['note'],
+                    'state': progress['state'],
+                })
+                sent_text = text
+                last_event = time.monotonic()
+
+                if progress['state'] in ('done', 'failed'):
+                    yield _sse('done', {'state': progress['state'], 'note': progress['note']})
+                    return
+            elif time.monotonic() - last_event >= PROGRESS_KEEPALIVE_SECONDS:
+                yield ': keepalive\n\n'
+                last_event = time.monotonic()
+
+            time.sleep(PROGRESS_POLL_SECONDS)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
 
 
 @app.route('/api/videos')
+@conditional()
 def api_videos():
-    """API endpoint to get all videos"""
-    processed = load_processed_videos()
-    return jsonify(processed)
+    """Videos as paged JSON or as an NDJSON stream of all matches
+
+    Query parameters:
+      fields=title,summary,...  only these fields ('transcript' loads the full text)
+      status=active,archived    only videos with these statuses
+      since=<ISO timestamp>     only videos changed since then (use as_of of the last sync)
+      limit, cursor             page size and next_cursor of the previous page
+      format=ndjson             (or Accept: application/x-ndjson) one record per line
+    """
+    fields = [field.strip() for field in request.args.get('fields', '').split(',') if field.strip()] or None
+    statuses = [status.strip() for status in request.args.get('status', '').split(',') if status.strip()] or None
+    since = request.args.get('since') or None
+    unknown = sorted(set(fields or ()) - API_FIELDS)
+    if unknown:
+        return jsonify({'error': f"Unbekannte Felder: {', '.join(unknown)}"}), 400
+
+    # Transcripts live in the blob store, the projection only carries the reference
+    with_transcript = fields is not None and 'transcript' in fields
+    keep_ref = with_transcript and 'transcript_ref' in fields
+    if with_transcript:
+        fields = [field for field in fields if field != 'transcript'] + ([] if keep_ref else ['transcript_ref'])
+
+    store = get_store()
+    # Taken before reading, so changes during the request show up in the next delta
+    as_of = datetime.now().isoformat()
+
+    def finish(record):
+        if with_transcript:
+            record['transcript'] = store.load_transcript(record)
+            if not keep_ref:
+                record.pop('transcript_ref', None)
+        return record
+
+    if request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        def generate():
+            # Written in batches, each one is compressed and flushed on its own
+            lines = []
+            for record in store.iter_pages(statuses, fields=fields, since=since):
+                lines.append(json.dumps(finish(record), ensure_ascii=False) + '\n')
+                if len(lines) >= NDJSON_BATCH:
+                    yield ''.join(lines)
+                    lines = []
+            if lines:
+                yield ''.join(lines)
+
+        response = Response(generate(), mimetype='application/x-ndjson', headers={'X-As-Of': as_of})
+    else:
+        try:
+            limit = min(max(int(request.args.get('limit', API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+        except ValueError:
+            limit = API_PAGE_SIZE
+        records, next_cursor = store.page(statuses, limit=limit, cursor=decode_cursor(request.args.get('cursor')),
+                                          fields=fields, since=since)
+        response = jsonify({
+            'videos': [finish(record) for record in records],
+            'next_cursor': encode_cursor(next_cursor),
+            'as_of': as_of,
+        })
+
+    return compress_response(response, request.headers.get('Accept-Encoding'))
 
 
 @app.route('/api/search')
+@conditional(search_version)
 def api_search():
-    """Search videos by title or content"""
-    query = request.args.get('q', '').lower()
-    processed = load_processed_videos()
+    """Ranked full-text search over title, channel, summary and transcript
+
+    Query params: q (supports "phrases" and prefix*), limit, offset
+    """
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    total, hits = get_search_index().search(query, limit=limit, offset=offset)
+    store = get_store()
+    # Only the hits, and only the fields of a result (timings for the transcript deep link)
+    found = {}
+    if hits:
+        with STATE_LOAD_SECONDS.time(view='search'):
+            records, _ = store.page(limit=len(hits), ids=[hit['video_id'] for hit in hits], fields=SEARCH_FIELDS)
+        found = {record['video_id']: record for record in records}
 
     results = []
-    for video_id, data in processed.items():
-        title = data.get('title', '').lower()
-        transcript = data.get('transcript', '').lower()
-        summary = data.get('summary', '').lower()
+    for hit in hits:
+        video_id = hit['video_id']
+        data = found.get(video_id)
+        if data is None:
+            continue
+
+        # Timestamp of the first transcript hit: one bisect over the stored timing columns
+        timestamp = None
+        if hit['transcript_match']:
+            timing = store.load_timing(data)
+            offset = match_offset(timing.text, hit['transcript_match']) if timing else None
+            if offset is not None:
+                timestamp = timing.timestamp_at(offset)
+
+        results.append({
+            'id': video_id,
+            'title': data.get('title'),
+            'channel': data.get('channel'),
+            'processed_at': data.get('processed_at'),
+            'thumbnail': thumbnail_url(video_id),
+            'status': data.get('status'),
+            'score': hit['score'],
+            'snippet': hit['snippet'],
+            'timestamp': timestamp,
+            'url': f'https://www.youtube.com/watch?v={video_id}' + (f'&t={timestamp}s' if timestamp is not None else '')
+        })
 
-        if query in title or query in transcript or query in summary:
-            results.append({
-                'id': video_id,
-                'title': data.get('title'),
-                'channel': data.get('channel'),
-                'processed_at': data.get('processed_at'),
-                'thumbnail': data.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg')
-            })
+    response = jsonify(results)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
-    return jsonify(results)
 
+@app.route('/thumbnails/<video_id>/<variant>.jpg')
+def thumbnail(video_id, variant):
+    """Thumbnail from the local cache, fetched from YouTube only once"""
+    if not VIDEO_ID.match(video_id) or variant not in VARIANTS:
+        return "Thumbnail not found", 404
 
-def save_processed_videos(data):
-    """Save processed videos to file"""
-    with open(STATE_FILE, 'w') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    thumbnails = get_thumbnails()
+    try:
+        entry = thumbnails.get(video_id, variant)
+    except requests.RequestException as e:
+        # YouTube is not reachable from here: let the browser try it directly
+        print(f"⚠️  Thumbnail für {video_id} nicht geladen: {e}")
+        return redirect(thumbnails.origin_url(video_id, VARIANTS[variant][0]))
+    if entry['data'] is None:
+        return "Thumbnail not found", 404
+
+    response = Response(entry['data'], mimetype='image/jpeg')
+    response.set_etag(entry['etag'])
+    response.cache_control.public = True
+    response.cache_control.max_age = THUMBNAIL_MAX_AGE
+    return response.make_conditional(request)
 
 
 @app.route('/api/video/<video_id>/archive', methods=['POST'])
 def archive_video(video_id):
     """Archive a video"""
-    processed = load_processed_videos()
-
-    if video_id not in processed:
+    if not get_store().set_status(video_id, 'archived'):
         return jsonify({'error': 'Video not found'}), 404
 
-    processed[video_id]['status'] = 'archived'
-    save_processed_videos(processed)
-
     return jsonify({'success': True, 'status': 'archived'})
 
 
 @app.route('/api/video/<video_id>/remove', methods=['POST'])
 def remove_video(video_id):
     """Mark a video as removed"""
-    processed = load_processed_videos()
-
-    if video_id not in processed:
+    if not get_store().set_status(video_id, 'removed'):
         return jsonify({'error': 'Video not found'}), 404
 
-    processed[video_id]['status'] = 'removed'
-    save_processed_videos(processed)
-
     return jsonify({'success': True, 'status': 'removed'})
 
 
 @app.route('/api/video/<video_id>/restore', methods=['POST'])
 def restore_video(video_id):
     """Restore a video to active status"""
-    processed = load_processed_videos()
-
-    if video_id not in processed:
+    if not get_store().set_status(video_id, 'active'):
         return jsonify({'error': 'Video not found'}), 404
 
-    processed[video_id]['status'] = 'active'
-    save_processed_videos(processed)
-
     return jsonify({'success': True, 'status': 'active'})
 
 
-@app.route('/archive')
-def archive():
-    """Show archived videos"""
-    youtube = get_youtube_service()
-
-    if not youtube:
-        return render_template('login.html')
-
-    # Load processed videos
-    processed = load_processed_videos()
-
-    # Get archived videos only
-    videos = []
-    for video_id, data in processed.items():
-        # Filter for archived videos
-        if data.get('status') != 'archived':
+def parse_bulk_filter(selection):
+    """Validate the filter of a bulk status change: ({key: value}, None) or (None, error message)
+
+    Values end up in SQL comparisons, where SQLite sorts numbers before any
+    text and compares dates as strings, so only ISO dates and strings pass.
+    """
+    if selection is None:
+        return {}, None
+    if not isinstance(selection, dict):
+        return None, 'filter must be an object'
+    unknown = set(selection) - {'channel', 'from', 'to', 'status'}
+    if unknown:
+        return None, f"unknown filter keys: {', '.join(sorted(unknown))}"
+
+    parsed = {}
+    for key in ('channel', 'status'):
+        value = selection.get(key)
+        if value is None or value == '':
             continue
+        if not isinstance(value, str):
+            return None, f'filter.{key} must be a string'
+        parsed[key] = value
+    if parsed.get('status', STATUSES[0]) not in STATUSES:
+        return None, f"filter.status must be one of {', '.join(STATUSES)}"
+    for key in ('from', 'to'):
+        value = selection.get(key)
+        if value is None or value == '':
+            continue
+        try:
+            if not isinstance(value, str):
+                raise ValueError
+            parsed[key] = date.fromisoformat(value).isoformat()
+        except ValueError:
+            return None, f'filter.{key} must be a date (YYYY-MM-DD)'
+    return parsed, None
+
+
+@app.route('/api/videos/status', methods=['POST'])
+def bulk_status():
+    """Change the status of many videos in one write
+
+    JSON body: {"status": "archived"|"removed"|"active", "ids": [...]} and/or
+    "filter": {"channel", "from", "to" (YYYY-MM-DD, inclusive), "status"}
+    """
+    data = request.get_json(silent=True) or {}
+    status = data.get('status')
+    if status not in STATUSES:
+        return jsonify({'error': f"status must be one of {', '.join(STATUSES)}"}), 400
+
+    ids = data.get('ids')
+    if ids is not None and not (isinstance(ids, list) and all(isinstance(video_id, str) for video_id in ids)):
+        return jsonify({'error': 'ids must be a list of video IDs'}), 400
+    selection, error = parse_bulk_filter(data.get('filter'))
+    if error:
+        return jsonify({'error': error}), 400
+    if ids is None and not selection:
+        return jsonify({'error': 'ids or filter required'}), 400
+
+    changed = get_store().set_status_bulk(
+        status, ids=ids,
+        channel=selection.get('channel'),
+        date_from=selection.get('from'),
+        date_to=selection.get('to'),
+        current_status=selection.get('status')
+    )
 
-        # If we don't have title, fetch from YouTube
-        if not data.get('title'):
-            try:
-                response = youtube.videos().list(
-                    part='snippet',
-                    id=video_id
-                ).execute()
-
-                if response.get('items'):
-                    snippet = response['items'][0]['snippet']
-                    data['title'] = snippet.get('title', 'Unknown Title')
-                    data['channel'] = snippet.get('channelTitle', 'Unknown Channel')
-                    data['thumbnail'] = snippet.get('thumbnails', {}).get('medium', {}).get('url', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg')
-            except Exception as e:
-                print(f"Error fetching video {video_id}: {e}")
-                data['title'] = 'Unknown Title'
-                data['channel'] = 'Unknown Channel'
-
-        videos.append({
-            'id': video_id,
-            'title': data.get('title', 'Unknown Title'),
-            'channel': data.get('channel', 'Unknown Channel'),
-            'processed_at': data.get('added_at') or data.get('processed_at', 'N/A'),
-            'transcript': data.get('transcript', ''),
-            'summary': data.get('summary', ''),
-            'thumbnail': data.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg')
-        })
+    return jsonify({'success': True, 'status': status, 'changed': len(changed), 'ids': changed})
 
-    # Sort by added_at date (newest first)
-    def sort_key(video):
-        date = video.get('processed_at', '')
-        return date if date else '1970-01-01'
 
-    videos.sort(key=sort_key, reverse=True)
+@app.route('/api/video-cards')
+@conditional(today, search_version)
+def api_video_cards():
+    """Next page of dashboard/archive cards as HTML (infinite scroll and the filter box)"""
+    status = 'archived' if request.args.get('view') == 'archive' else 'active'
+    page = video_page(status, decode_cursor(request.args.get('cursor')), request.args.get('q', '').strip())
+    return jsonify({
+        'html': render_template('video_groups.html', grouped_videos=page['grouped_videos'],
+                                archived=status == 'archived'),
+        'total': page['total'],
+        'next_cursor': page['next_cursor'],
+    })
 
-    # Group videos by date
-    grouped_videos = group_videos_by_date(videos)
 
-    return render_template('archive.html', grouped_videos=grouped_videos, total=len(videos))
+@app.route('/archive')
+@conditional(logged_in, today)
+def archive():
+    """Show archived videos"""
+    # Metadata is filled in by the worker, pages never call the YouTube API
+    if not load_credentials():
+        return render_template('login.html')
+
+    page = video_page('archived')
+    return render_template('archive.html', archived=True, **page)
 
 
 if __name__ == '__main__':
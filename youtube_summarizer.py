@@ -7,34 +7,201 @@ Checks your Watch Later playlist and sends email summaries of new videos
 import os
 import time
 import json
-import smtplib
+import threading
 import pickle
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
 import anthropic
+import requests
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from mail_outbox import MailOutbox, SmtpConnection
+from pipeline import Stage, StagedPipeline
+from rapidapi_client import RapidApiPool
+from rate_limiter import RateGovernor, error_type, is_retryable
+from search_index import SearchIndex
+from state_store import StateStore
+import metrics
+import summary_render
+from summary_cache import SummaryCache
+from thumbnail_cache import ThumbnailCache
+from transcript_cache import TranscriptCache
 
 # YouTube OAuth2 Scopes - wir brauchen readonly für Watch Later
 SCOPES = ['https://www.googleapis.com/auth/youtube.readonly']
 
+# Claude Sonnet 4.5 (neueste Version) + Fallback
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+CLAUDE_FALLBACK_MODEL = "claude-sonnet-4-latest"
+
+# Bump whenever the summary prompt changes: cached summaries of older versions
+# are dropped and `backfill_videos.py --stale` regenerates the affected videos
+PROMPT_VERSION = 2
+
+# Longer transcripts are summarized in chunks (map) and then combined (reduce)
+LONG_TRANSCRIPT_CHARS = 15000
+CHUNK_SUMMARY_MAX_TOKENS = 1500
+
+# Only the fields we actually use: video id, title, channel and date added
+PLAYLIST_FIELDS = ('etag,nextPageToken,pageInfo/totalResults,'
+                   'items/snippet(title,publishedAt,videoOwnerChannelTitle,resourceId/videoId)')
+
+# Metadata for the enrichment step (videos.list accepts up to 50 IDs per call)
+VIDEO_FIELDS = 'items(id,snippet(title,channelTitle,thumbnails/medium/url),contentDetails/duration)'
+VIDEOS_PER_REQUEST = 50
+
+# Static part of the summary prompt. Sent as a system block marked for caching,
+# the title and transcript of each video follow in the user message. The API only
+# caches prefixes above a model-specific minimum (1024 tokens for Sonnet); these
+# instructions are below it, so the marker only takes effect once they grow past
+# it. Until then the cache counters logged per call stay at 0.
+SUMMARY_INSTRUCTIONS = """Du erstellst Zusammenfassungen von YouTube-Videos für eine Email.
+Du bekommst den Video-Titel und das Transkript (oder Notizen zu allen Abschnitten eines langen Videos).
+
+WICHTIG: Formatiere die Zusammenfassung als PLAIN TEXT ohne Markdown!
+Nutze nur einfache Textformatierung:
+- Für Überschriften: GROSSBUCHSTABEN und Leerzeilen
+- Für Listen: Einfache Bindestriche (-)
+- Keine #, **, *, ~~, etc.
+
+Erstelle eine Zusammenfassung mit:
+
+1. SCHNELLÜBERSICHT (2-3 Sätze)
+   → Was LERNE ich konkret in diesem Video?
+   → Was sind die wichtigsten ERKENNTNISSE oder TAKEAWAYS?
+   → Nicht nur beschreiben, sondern die Kernbotschaft erklären!
+
+2. HAUPTTHEMA (2-3 Sätze)
+   → Kontext und Hintergrund ausführlicher erklären
+   → Warum ist dieses Thema relevant?
+
+3. KERNPUNKTE
+   → Bei Listen-Videos: ALLE Punkte! Bei normalen Videos: 5-7 Hauptpunkte
+   → Jeder Punkt 1-2 Sätze mit Details
+   → Verwende Nummerierung (1., 2., 3., ...)
+
+4. FAZIT (2-3 Sätze)
+   → Zusammenfassung und praktische Relevanz
+   → Was sollte ich als nächstes tun?
+
+Format-Beispiel für Listen-Video:
+=================================
+SCHNELLÜBERSICHT
+In diesem Video lernst du 10 konkrete Strategien, um deine Produktivität zu verdoppeln. Die wichtigsten Erkenntnisse: Zeit-Blocking ist effektiver als To-Do-Listen, und kurze Pausen erhöhen die Konzentration nachweislich.
+
+HAUPTTHEMA
+Produktivität ist nicht nur eine Frage der Zeitverwaltung, sondern auch der mentalen Energie...
+
+KERNPUNKTE
+1. Zeit-Blocking: Plane feste Zeitblöcke für Aufgaben statt vage To-Do-Listen...
+2. Pomodoro-Technik: 25 Minuten fokussierte Arbeit, 5 Minuten Pause...
+3. Digital Detox: Handy in den Flugmodus während wichtiger Aufgaben...
+[... alle 10 Punkte auflisten ...]
+
+FAZIT
+Die Strategien zeigen, dass kleine Änderungen große Wirkung haben können...
+================================="""
+
+# How often partial summary text is written to the store while streaming
+PROGRESS_FLUSH_SECONDS = 0.5
+
+# Metrics of the worker, served by /metrics in the web app (see metrics.py)
+PLAYLIST_FETCH_SECONDS = metrics.histogram('playlist_fetch_seconds', 'Duration of a playlist sync')
+TRANSCRIPT_FETCH_SECONDS = metrics.histogram(
+    'transcript_fetch_seconds', 'Duration of a transcript download per provider', ['provider', 'result'])
+TRANSCRIPTS = metrics.counter(
+    'transcripts_total', 'Transcript lookups by provider (cache, youtube-transcript-api, rapidapi)',
+    ['provider', 'result'])
+CLAUDE_SECONDS = metrics.histogram('claude_request_seconds', 'Duration of a Claude call', ['model', 'result'])
+CLAUDE_FIRST_TOKEN_SECONDS = metrics.histogram(
+    'claude_first_token_seconds', 'Time until the first streamed token', ['model'])
+CLAUDE_RETRIES = metrics.counter('claude_retries_total', 'Retried Claude calls', ['model'])
+CLAUDE_TOKENS = metrics.counter('claude_tokens_total', 'Tokens used per model and kind', ['model', 'kind'])
+VIDEOS = metrics.counter('videos_total', 'Videos leaving the pipeline by result', ['result'])
+
+
+class SummaryProgress:
+    """Persists the partial text of a streaming summary for the web app
+
+    Best effort: a failed progress write never fails the summary itself.
+    """
+
+    def __init__(self, store, video_id, title, max_tokens):
+        self.store = store
+        self.video_id = video_id
+        self.title = title
+        self.max_tokens = max_tokens
+        self.text = ''
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def _write(self, **fields):
+        with self._lock:
+            try:
+                self.store.set_progress(self.video_id, **fields)
+            except Exception as e:
+                print(f"⚠️  Fortschritt konnte nicht gespeichert werden: {e}")
+
+    def start(self, note=None):
+        self.text = ''
+        self._write(title=self.title, state='summarizing', text='', max_tokens=self.max_tokens,
+                    note=note, started_at=datetime.now().isoformat())
+
+    def note(self, note):
+        self._write(note=note)
+
+    def append(self, delta):
+        self.text += delta
+        if time.monotonic() - self._last_flush >= PROGRESS_FLUSH_SECONDS:
+            self.flush()
+
+    def reset(self):
+        """Start over (e.g. when a streaming call is retried)"""
+        self.text = ''
+        self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        self._write(text=self.text)
+
+    def finish(self, text):
+        self.text = text
+        self._write(state='done', text=text, note=None)
+
+    def fail(self, error):
+        self._write(state='failed', note=error)
+
 
 class YouTubeSummarizer:
+    # Whether the "prompt cache not used" note was printed (once per process)
+    _cache_note_shown = False
+
     def __init__(self):
         # Load config
         self.claude_api_key = os.getenv('CLAUDE_API_KEY')
         self.email_from = os.getenv('EMAIL_FROM')
         self.email_to = os.getenv('EMAIL_TO')
         self.email_password = os.getenv('EMAIL_PASSWORD')
-        self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
-        self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
+        # Digest: one email per cycle with all new summaries instead of one per video
+        self.email_digest = os.getenv('EMAIL_DIGEST', 'false').lower() in ('1', 'true', 'yes')
         self.check_interval = int(os.getenv('CHECK_INTERVAL_MINUTES', '30'))
         self.playlist_id = os.getenv('PLAYLIST_ID', 'WL')  # Default: Watch Later
+        # Alle X Stunden wird die komplette Playlist abgeglichen, sonst nur inkrementell
+        self.full_sync_hours = float(os.getenv('PLAYLIST_FULL_SYNC_HOURS', '24'))
+
+        # Worker threads per pipeline stage
+        self.transcript_workers = int(os.getenv('TRANSCRIPT_WORKERS', '3'))
+        self.summary_workers = int(os.getenv('SUMMARY_WORKERS', '3'))
+        self.email_workers = int(os.getenv('EMAIL_WORKERS', '1'))
+        # Chunk size and parallel calls for long transcripts
+        self.summary_chunk_tokens = int(os.getenv('SUMMARY_CHUNK_TOKENS', '4000'))
+        self.summary_chunk_workers = int(os.getenv('SUMMARY_CHUNK_WORKERS', '8'))
         
         # OAuth2 credentials files
         self.credentials_file = Path('/data/credentials.json')
@@ -42,11 +209,55 @@ class YouTubeSummarizer:
         
         # Initialize APIs
         self.youtube = self.get_authenticated_service()
-        self.claude_client = anthropic.Anthropic(api_key=self.claude_api_key)
+        # Retries are handled by the shared rate governor, not by the SDK.
+        # CLAUDE_BASE_URL allows pointing at a local stand-in for testing.
+        self.claude_client = anthropic.Anthropic(
+            api_key=self.claude_api_key,
+            base_url=os.getenv('CLAUDE_BASE_URL') or None,
+            max_retries=0
+        )
+        self.rate_governor = RateGovernor.from_env()
+        self.claude_max_retries = int(os.getenv('CLAUDE_MAX_RETRIES', '5'))
+        self.batch_poll_seconds = int(os.getenv('BATCH_POLL_SECONDS', '60'))
+        # Days of change history kept in the state journal
+        self.journal_days = int(os.getenv('STATE_JOURNAL_DAYS', '90'))
         
         # Track processed videos
-        self.state_file = Path('/data/processed_videos.json')
-        self.processed_videos = self.load_state()
+        self.store = StateStore()
+        self.search_index = SearchIndex()
+        self.transcript_cache = TranscriptCache.from_env()
+        self.thumbnails = ThumbnailCache.from_env()
+        self.rapidapi = RapidApiPool.from_env(pool_size=self.transcript_workers)
+        self.summary_cache = SummaryCache()
+        self.outbox = MailOutbox(self.store, SmtpConnection.from_env(),
+                                 self.email_from, self.email_to, digest=self.email_digest)
+
+        # Pipeline of the current cycle and the videos it has not finished yet
+        self.pipeline = None
+        self.pending_ids = set()
+        self.register_metrics()
+
+    def register_metrics(self):
+        """Live values of the worker for the metrics snapshot (read when it is written)"""
+        metrics.gauge('pipeline_queue_depth', 'Videos waiting in the queue of a pipeline stage', ['stage'],
+                      function=lambda: {(stage.name,): stage.queue.qsize()
+                                        for stage in (self.pipeline.stages if self.pipeline else [])})
+        metrics.gauge('videos_pending', 'Videos of the current cycle that are not processed yet',
+                      function=lambda: len(self.pending_ids))
+        metrics.counter('claude_throttled_total', 'Claude calls delayed by the local rate governor',
+                        function=lambda: self.rate_governor.stats['throttled'])
+        metrics.counter('claude_rate_limited_total', 'Claude calls answered with 429',
+                        function=lambda: self.rate_governor.stats['rate_limited'])
+        metrics.counter('rapidapi_requests_total', 'RapidAPI requests by outcome', ['outcome'],
+                        function=lambda: {(name,): value for name, value in self.rapidapi.stats.items()})
+        metrics.gauge('rapidapi_key_cooldown_seconds', 'Remaining cooldown per RapidAPI key', ['key'],
+                      function=lambda: {(key['key'],): key['cooldown_seconds'] for key in self.rapidapi.health()})
+        metrics.counter('summary_cache_requests_total', 'Summary cache lookups', ['result'],
+                        function=self._summary_cache_counts)
+
+    def _summary_cache_counts(self):
+        stats = self.summary_cache.stats()
+        return {('hit',): stats['hits'], ('miss',): stats['misses']}
     
     def get_authenticated_service(self):
         """Authenticate with YouTube using OAuth2"""
@@ -121,199 +332,338 @@ class YouTubeSummarizer:
 
         return service
     
-    def load_state(self):
-        """Load already processed videos"""
-        if self.state_file.exists():
-            with open(self.state_file, 'r') as f:
-                data = json.load(f)
-                # Handle old format (list) vs new format (dict)
-                if isinstance(data, list):
-                    # Convert old format to new format
-                    return {video_id: {} for video_id in data}
-                return data
-        return {}
-
-    def save_state(self):
-        """Save processed videos with all details"""
-        self.state_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.state_file, 'w') as f:
-            json.dump(self.processed_videos, f, indent=2)
-    
-    def get_watch_later_videos(self):
-        """Get videos from configured playlist"""
+    def get_watch_later_videos(self, full=False):
+        """Get videos from configured playlist
+
+        Incremental by default: the first page is requested with If-None-Match
+        (304 = nothing changed) and paging stops as soon as a page only contains
+        known videos. A full pass over all pages runs every PLAYLIST_FULL_SYNC_HOURS
+        or when full=True (e.g. for the backfill).
+        """
         try:
-            print(f"🔍 Versuche Playlist abzurufen...")
-            print(f"🔍 Verwende Playlist ID: {self.playlist_id}")
+            known_ids = self.store.ids()
+            sync = json.loads(self.store.get_meta('playlist_sync') or '{}')
+            if sync.get('playlist_id') != self.playlist_id:
+                sync = {'playlist_id': self.playlist_id}
 
-            # Get ALL playlist items with pagination
-            all_items = []
+            last_full_sync = sync.get('last_full_sync')
+            if (not last_full_sync or datetime.now() - datetime.fromisoformat(last_full_sync)
+                    > timedelta(hours=self.full_sync_hours)):
+                full = True
+
+            print(f"🔍 Rufe Playlist {self.playlist_id} ab ({'vollständig' if full else 'inkrementell'})...")
+
+            # Videos that were seen before but not processed yet (e.g. failed summary)
+            pending = {v['id']: v for v in sync.get('pending', []) if v['id'] not in known_ids}
+
+            videos = []
             next_page_token = None
+            previous_total = sync.get('total') or 0
+            total = previous_total
+            pages = 0
 
             while True:
                 request = self.youtube.playlistItems().list(
-                    part='snippet,contentDetails',
+                    part='snippet',
                     playlistId=self.playlist_id,
                     maxResults=50,
-                    pageToken=next_page_token
+                    pageToken=next_page_token,
+                    fields=PLAYLIST_FIELDS
                 )
-                response = request.execute()
+                if pages == 0 and not full and sync.get('etag'):
+                    request.headers['If-None-Match'] = sync['etag']
 
-                all_items.extend(response.get('items', []))
+                try:
+                    response = request.execute()
+                except HttpError as e:
+                    if e.resp.status == 304:
+                        print("✨ Playlist unverändert (304 Not Modified)")
+                        break
+                    raise
+                pages += 1
+
+                if pages == 1:
+                    sync['etag'] = response.get('etag')
+                    total = response.get('pageInfo', {}).get('totalResults', total)
+
+                page_videos = [self._playlist_item_to_video(item) for item in response.get('items', [])]
+                videos.extend(page_videos)
                 next_page_token = response.get('nextPageToken')
 
                 if not next_page_token:
                     break
 
-            print(f"🔍 API Response erhalten. Keys: {list(response.keys())}")
-            print(f"🔍 Total Results: {response.get('pageInfo', {}).get('totalResults', 'unknown')}")
-            print(f"🔍 Total Videos geholt mit Pagination: {len(all_items)}")
-
-            videos = []
-            items = all_items
-            print(f"🔍 Items in Response: {len(items)}")
-
-            for item in items:
-                video_id = item['contentDetails']['videoId']
-                title = item['snippet']['title']
-                # publishedAt ist das Datum, wann das Video zur Playlist hinzugefügt wurde
-                added_at = item['snippet']['publishedAt']
-                videos.append({
-                    'id': video_id,
-                    'title': title,
-                    'added_at': added_at
-                })
-
-            print(f"📊 API hat {len(videos)} Videos in Watch Later gefunden")
+                # Stop early once a page only holds known videos and we found as many
+                # new ones as the playlist grew (new items may also be appended at the end)
+                if not full and all(v['id'] in known_ids for v in page_videos):
+                    new_count = sum(1 for v in videos if v['id'] not in known_ids)
+                    if new_count >= total - previous_total:
+                        print(f"⏩ Seite {pages} enthält nur bekannte Videos, stoppe Paginierung")
+                        break
+
+            for video in videos:
+                pending.pop(video['id'], None)
+            videos.extend(pending.values())
+
+            sync['total'] = total
+            sync['pending'] = [v for v in videos if v['id'] not in known_ids]
+            if full:
+                sync['last_full_sync'] = datetime.now().isoformat()
+            self.store.set_meta('playlist_sync', json.dumps(sync, ensure_ascii=False))
+
+            print(f"📊 {pages} Seite(n) abgerufen, {len(videos)} Videos geprüft (Playlist: {total} Videos)")
             return videos
         except Exception as e:
             print(f"❌ Fehler beim Abrufen der Watch Later Liste: {e}")
             import traceback
             traceback.print_exc()
             return []
-    
-    def get_transcript_rapidapi(self, video_id):
-        """Fallback: Get transcript using RapidAPI YT API (requires API keys)"""
-        import requests
 
-        # Support multiple RapidAPI keys (comma-separated in .env)
-        rapidapi_keys = os.getenv('RAPIDAPI_KEYS', '').split(',')
-        rapidapi_keys = [key.strip() for key in rapidapi_keys if key.strip()]
+    @staticmethod
+    def _playlist_item_to_video(item):
+        snippet = item['snippet']
+        return {
+            'id': snippet['resourceId']['videoId'],
+            'title': snippet['title'],
+            # Fehlt bei privaten/gelöschten Videos
+            'channel': snippet.get('videoOwnerChannelTitle', 'Unknown'),
+            # publishedAt ist das Datum, wann das Video zur Playlist hinzugefügt wurde
+            'added_at': snippet['publishedAt']
+        }
+
+    @staticmethod
+    def parse_iso_duration(duration):
+        """Convert an ISO 8601 duration (PT1H2M3S) to seconds"""
+        import re
 
-        if not rapidapi_keys:
-            print(f"❌ Keine RapidAPI Keys konfiguriert")
+        match = re.fullmatch(r'P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration or '')
+        if not match:
             return None
+        days, hours, minutes, seconds = (int(g or 0) for g in match.groups())
+        return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+    def enrich_metadata(self):
+        """Fill in title, channel, thumbnail and duration for videos that lack them
 
-        # Try each API key in rotation
-        for i, api_key in enumerate(rapidapi_keys):
+        Uses batched videos.list calls (50 IDs each) and saves the results, so
+        the web app never has to ask the YouTube API while rendering.
+        """
+        video_ids = self.store.ids_missing('enriched_at')
+        if not video_ids:
+            return 0
+
+        print(f"🏷️  Lade Metadaten für {len(video_ids)} Videos...")
+        enriched = 0
+        for start in range(0, len(video_ids), VIDEOS_PER_REQUEST):
+            chunk = video_ids[start:start + VIDEOS_PER_REQUEST]
             try:
-                print(f"🔄 Versuche RapidAPI (Key {i+1}/{len(rapidapi_keys)})...")
-
-                # Use YT API endpoint for subtitles/captions
-                url = "https://yt-api.p.rapidapi.com/subtitles"
-
-                querystring = {"id": video_id}
-
-                headers = {
-                    "x-rapidapi-key": api_key,
-                    "x-rapidapi-host": "yt-api.p.rapidapi.com"
-                }
-
-                response = requests.get(url, headers=headers, params=querystring, timeout=30)
-
-                if response.status_code == 200:
-                    data = response.json()
-
-                    # YT API returns subtitles in different formats
-                    # Try to extract text from the response
-                    if isinstance(data, dict):
-                        # If it has subtitles array
-                        if 'subtitles' in data and data['subtitles']:
-                            # Get first available subtitle track
-                            subtitle_track = data['subtitles'][0]
-
-                            # Check if we have a URL to fetch transcript from
-                            if 'url' in subtitle_track:
-                                print(f"🔄 Lade Transkript von URL...")
-                                try:
-                                    transcript_response = requests.get(subtitle_track['url'], timeout=30)
-                                    if transcript_response.status_code == 200:
-                                        # Parse XML format (srv1, srv2, srv3)
-                                        import xml.etree.ElementTree as ET
-                                        root = ET.fromstring(transcript_response.text)
-
-                                        # Extract text from all <text> elements
-                                        texts = []
-                                        for text_elem in root.findall('.//text'):
-                                            text_content = text_elem.text
-                                            if text_content:
-                                                texts.append(text_content)
-
-                                        if texts:
-                                            full_text = ' '.join(texts)
-                                        else:
-                                            print(f"❌ RapidAPI: Keine Texte in XML gefunden")
-                                            continue
-                                    else:
-                                        print(f"❌ RapidAPI: URL request failed: {transcript_response.status_code}")
-                                        continue
-                                except Exception as url_error:
-                                    print(f"❌ RapidAPI: Fehler beim Laden von URL: {url_error}")
-                                    continue
-
-                            # Fallback: Check for direct text/segments (old format)
-                            elif 'text' in subtitle_track:
-                                full_text = subtitle_track['text']
-                            elif 'segments' in subtitle_track:
-                                full_text = ' '.join([seg.get('text', '') for seg in subtitle_track['segments']])
-                            else:
-                                print(f"❌ RapidAPI: Unbekanntes Subtitles Format")
-                                print(f"Subtitle keys: {list(subtitle_track.keys())}")
-                                continue
-                        elif 'text' in data:
-                            full_text = data['text']
-                        else:
-                            print(f"❌ RapidAPI: Kein Transkript in Response gefunden")
-                            print(f"Response keys: {list(data.keys())}")
-                            continue
-                    elif isinstance(data, list) and len(data) > 0:
-                        # If it's an array of text segments
-                        full_text = ' '.join([item.get('text', str(item)) for item in data])
-                    else:
-                        print(f"❌ RapidAPI: Unexpected response format: {type(data)}")
-                        continue
-
-                    # Clean up extra whitespace
-                    import re
-                    full_text = re.sub(r'\s+', ' ', full_text).strip()
-
-                    if full_text:
-                        print(f"✅ Transkript via RapidAPI erhalten: {len(full_text)} Zeichen")
-                        return full_text
-                    else:
-                        print(f"❌ RapidAPI: Transkript ist leer")
-                        continue
-
-                elif response.status_code == 429:
-                    print(f"⚠️  RapidAPI Key {i+1} hat Rate Limit erreicht, versuche nächsten...")
-                    continue
-                elif response.status_code == 403:
-                    print(f"⚠️  RapidAPI Key {i+1}: Nicht für diese API subscribed")
-                    continue
+                response = self.youtube.videos().list(
+                    part='snippet,contentDetails',
+                    id=','.join(chunk),
+                    fields=VIDEO_FIELDS
+                ).execute()
+            except Exception as e:
+                print(f"⚠️  Metadaten konnten nicht geladen werden: {e}")
+                return enriched
+
+            found = {item['id']: item for item in response.get('items', [])}
+            now = datetime.now().isoformat()
+            for video_id in chunk:
+                item = found.get(video_id)
+                # Also mark private/deleted videos, so they are not requested every cycle
+                record = {'enriched_at': now}
+                if item:
+                    existing = self.store.get(video_id) or {}
+                    snippet = item.get('snippet', {})
+                    if not existing.get('title'):
+                        record['title'] = snippet.get('title', 'Unknown Title')
+                    record['channel'] = snippet.get('channelTitle') or existing.get('channel', 'Unknown')
+                    thumbnail = snippet.get('thumbnails', {}).get('medium', {}).get('url')
+                    if thumbnail:
+                        record['thumbnail'] = thumbnail
+                    record['duration_seconds'] = self.parse_iso_duration(
+                        item.get('contentDetails', {}).get('duration'))
+                    enriched += 1
+                self.store.upsert(video_id, record)
+                if 'title' in record:
+                    self.search_index.update(self.store, video_id)
+
+        print(f"✅ Metadaten für {enriched} Videos gespeichert")
+        return enriched
+
+    def get_transcript_rapidapi(self, video_id):
+        """Fallback: Get transcript using RapidAPI YT API (requires API keys)
+
+        Returns:
+            tuple: (segments, language, 'rapidapi') or None
+                - segments: list of {'text', 'start', 'duration'} dicts
+        """
+        if not self.rapidapi.keys:
+            print(f"❌ Keine RapidAPI Keys konfiguriert")
+            return None
+
+        # Use YT API endpoint for subtitles/captions (the pool picks the healthiest key)
+        response = self.rapidapi.get('/subtitles', params={"id": video_id})
+        if response is None:
+            print(f"❌ Alle RapidAPI Keys erschöpft")
+            return None
+        if response.status_code != 200:
+            # Not a key problem (e.g. unknown video): another key would get the same answer
+            print(f"❌ RapidAPI Error {response.status_code}: {response.text[:100]}")
+            return None
+
+        try:
+            result = self.parse_rapidapi_subtitles(response.json())
+        except Exception as e:
+            print(f"❌ RapidAPI Fehler: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+        if not result:
+            return None
+
+        segments, language = result
+        full_text = self.join_segments(segments)
+        if not full_text:
+            print(f"❌ RapidAPI: Transkript ist leer")
+            return None
+
+        print(f"✅ Transkript via RapidAPI erhalten: {len(full_text)} Zeichen")
+        return segments, language, 'rapidapi'
+
+    def parse_rapidapi_subtitles(self, data):
+        """Extract (segments, language) from a YT API subtitles response, or None"""
+        language = 'unknown'
+
+        # YT API returns subtitles in different formats
+        # Try to extract text from the response
+        if isinstance(data, dict):
+            # If it has subtitles array
+            if 'subtitles' in data and data['subtitles']:
+                # Get first available subtitle track
+                subtitle_track = data['subtitles'][0]
+                language = subtitle_track.get('languageCode', language)
+
+                # Check if we have a URL to fetch transcript from
+                if 'url' in subtitle_track:
+                    print(f"🔄 Lade Transkript von URL...")
+                    try:
+                        # Same keep-alive session as the API calls
+                        transcript_response = self.rapidapi.session.get(subtitle_track['url'], timeout=30)
+                        if transcript_response.status_code != 200:
+                            print(f"❌ RapidAPI: URL request failed: {transcript_response.status_code}")
+                            return None
+
+                        # Parse XML format (srv1, srv2, srv3)
+                        import xml.etree.ElementTree as ET
+                        root = ET.fromstring(transcript_response.text)
+
+                        # Extract text and timing from all <text> elements
+                        segments = []
+                        for text_elem in root.findall('.//text'):
+                            text_content = text_elem.text
+                            if text_content:
+                                segments.append({
+                                    'text': text_content,
+                                    'start': float(text_elem.get('start', 0)),
+                                    'duration': float(text_elem.get('dur', 0))
+                                })
+
+                        if not segments:
+                            print(f"❌ RapidAPI: Keine Texte in XML gefunden")
+                            return None
+                    except Exception as url_error:
+                        print(f"❌ RapidAPI: Fehler beim Laden von URL: {url_error}")
+                        return None
+
+                # Fallback: Check for direct text/segments (old format)
+                elif 'text' in subtitle_track:
+                    segments = [{'text': subtitle_track['text'], 'start': 0.0, 'duration': 0.0}]
+                elif 'segments' in subtitle_track:
+                    segments = [{
+                        'text': seg.get('text', ''),
+                        'start': float(seg.get('start', 0)),
+                        'duration': float(seg.get('duration', seg.get('dur', 0)))
+                    } for seg in subtitle_track['segments']]
                 else:
-                    print(f"❌ RapidAPI Error {response.status_code}: {response.text[:100]}")
-                    continue
+                    print(f"❌ RapidAPI: Unbekanntes Subtitles Format")
+                    print(f"Subtitle keys: {list(subtitle_track.keys())}")
+                    return None
+            elif 'text' in data:
+                segments = [{'text': data['text'], 'start': 0.0, 'duration': 0.0}]
+            else:
+                print(f"❌ RapidAPI: Kein Transkript in Response gefunden")
+                print(f"Response keys: {list(data.keys())}")
+                return None
+        elif isinstance(data, list) and len(data) > 0:
+            # If it's an array of text segments
+            segments = [{
+                'text': item.get('text', str(item)),
+                'start': float(item.get('start', 0)),
+                'duration': float(item.get('duration', item.get('dur', 0)))
+            } if isinstance(item, dict) else {'text': str(item), 'start': 0.0, 'duration': 0.0}
+                for item in data]
+        else:
+            print(f"❌ RapidAPI: Unexpected response format: {type(data)}")
+            return None
 
-            except Exception as e:
-                print(f"❌ RapidAPI Fehler mit Key {i+1}: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
+        return segments, language
 
-        print(f"❌ Alle RapidAPI Keys erschöpft")
-        return None
+    @staticmethod
+    def join_segments(segments):
+        """Combine transcript segments into one cleaned-up text"""
+        import re
+
+        full_text = ' '.join([item['text'] for item in segments])
+        # Clean up extra whitespace
+        return re.sub(r'\s+', ' ', full_text).strip()
 
     def get_transcript(self, video_id):
-        """Get transcript with fallback: youtube-transcript-api -> RapidAPI"""
+        """Get transcript text (from the local cache if we already downloaded it)"""
+        segments = self.get_transcript_segments(video_id)
+        if not segments:
+            return None
+        return self.join_segments(segments)
+
+    def get_transcript_segments(self, video_id):
+        """Get raw timed transcript segments, cached by (video, language, source)"""
+        cached = self.transcript_cache.get(video_id)
+        if cached:
+            print(f"💾 Transkript aus Cache ({cached['language']}, {cached['source']})")
+            TRANSCRIPTS.inc(provider='cache', result='success')
+            return cached['segments']
+
+        result = self.fetch_transcript(video_id)
+        if not result:
+            return None
+
+        segments, language, source = result
+        self.transcript_cache.put(video_id, language, source, segments)
+        return segments
+
+    def fetch_transcript(self, video_id):
+        """Download transcript with fallback: youtube-transcript-api -> RapidAPI
+
+        Returns:
+            tuple: (segments, language, source) or None
+        """
+        for provider, fetch in (('youtube-transcript-api', self.get_transcript_youtube),
+                                ('rapidapi', self.get_transcript_rapidapi)):
+            with TRANSCRIPT_FETCH_SECONDS.time(provider=provider, result='failure') as labels:
+                result = fetch(video_id)
+                if result:
+                    labels['result'] = 'success'
+            TRANSCRIPTS.inc(provider=provider, result=labels['result'])
+            if result:
+                return result
+        return None
+
+    def get_transcript_youtube(self, video_id):
+        """Primary: youtube-transcript-api (free, no rate limits)
+
+        Returns:
+            tuple: (segments, language, 'youtube-transcript-api') or None
+        """
         from youtube_transcript_api import YouTubeTranscriptApi
         from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
 
@@ -330,47 +680,42 @@ class YouTubeSummarizer:
                 lang_name = fetched_transcript.language
                 print(f"📥 Transkript gefunden ({lang_name})...")
 
-                # Convert FetchedTranscript to raw data (list of dicts)
+                # Convert FetchedTranscript to raw data (list of dicts with text/start/duration)
                 transcript_list = fetched_transcript.to_raw_data()
 
             except NoTranscriptFound:
                 print(f"⚠️  youtube-transcript-api: Kein Transkript in DE/EN gefunden, versuche RapidAPI...")
-                return self.get_transcript_rapidapi(video_id)
-
-            # Combine all transcript segments
-            full_text = ' '.join([item['text'] for item in transcript_list])
+                return None
 
-            # Clean up extra whitespace
-            import re
-            full_text = re.sub(r'\s+', ' ', full_text).strip()
+            full_text = self.join_segments(transcript_list)
 
             if not full_text:
                 print(f"⚠️  Transkript ist leer, versuche RapidAPI...")
-                return self.get_transcript_rapidapi(video_id)
+                return None
 
             print(f"✅ Transkript verarbeitet: {len(full_text)} Zeichen")
-            return full_text
+            return transcript_list, fetched_transcript.language_code, 'youtube-transcript-api'
 
         except TranscriptsDisabled:
             print(f"⚠️  Transkripte deaktiviert via youtube-transcript-api, versuche RapidAPI...")
-            return self.get_transcript_rapidapi(video_id)
+            return None
 
         except NoTranscriptFound:
             print(f"⚠️  Kein Transkript via youtube-transcript-api, versuche RapidAPI...")
-            return self.get_transcript_rapidapi(video_id)
+            return None
 
         except Exception as e:
             error_msg = str(e)
             if "no longer available" in error_msg or "VideoUnavailable" in str(type(e)):
                 print(f"⚠️  Video nicht verfügbar via youtube-transcript-api, versuche RapidAPI...")
-                return self.get_transcript_rapidapi(video_id)
+                return None
             else:
                 print(f"❌ Unerwarteter Fehler: {e}")
                 import traceback
                 traceback.print_exc()
                 print(f"⚠️  Versuche RapidAPI als Fallback...")
-                return self.get_transcript_rapidapi(video_id)
-    
+                return None
+
     def calculate_max_tokens(self, title):
         """Berechne max_tokens dynamisch basierend auf Titel"""
         import re
@@ -394,13 +739,11 @@ class YouTubeSummarizer:
         # Standard für Videos ohne große Listen
         return 4000
 
-    def summarize_with_claude(self, title, transcript):
-        """Create summary using Claude
+    def build_summary_params(self, title, transcript, model=None, notes=False):
+        """Build the messages.create parameters for summarizing one video
 
-        Returns:
-            tuple: (success: bool, summary: str)
-                - success: True if summarization succeeded, False if it failed
-                - summary: The summary text (or error message if failed)
+        Shared by the direct API path and the Message Batches backfill.
+        With notes=True, `transcript` holds the combined chunk notes of a long video.
         """
         import re
 
@@ -427,109 +770,287 @@ Zähle die Punkte von 1 bis {required_points}.
 Wenn du weniger als {required_points} Punkte auflistest, ist die Zusammenfassung UNVOLLSTÄNDIG und FALSCH!
 """
 
-        prompt = f"""Bitte erstelle eine Zusammenfassung dieses YouTube-Videos für eine Email.
+        if notes:
+            source = f"""Notizen zu allen Abschnitten des Videos (das Transkript war zu lang für einen Durchgang):
+{transcript}"""
+        else:
+            # Longer transcripts go through summarize_long_transcript()
+            source = f"""Transkript:
+{transcript[:LONG_TRANSCRIPT_CHARS]}"""
 
-Video-Titel: {title}
-
-Transkript:
-{transcript[:15000]}  # Limit to avoid token limits
-
-WICHTIG: Formatiere die Zusammenfassung als PLAIN TEXT ohne Markdown!
-Nutze nur einfache Textformatierung:
-- Für Überschriften: GROSSBUCHSTABEN und Leerzeilen
-- Für Listen: Einfache Bindestriche (-)
-- Keine #, **, *, ~~, etc.
+        # Only the per-video part; the instructions are the cached system prefix
+        prompt = f"""Video-Titel: {title}
 {list_instruction}
+{source}"""
+
+        return {
+            'model': model or CLAUDE_MODEL,
+            'max_tokens': self.calculate_max_tokens(title),
+            # Identical for every video, so it is marked for prompt caching
+            'system': [
+                {"type": "text", "text": SUMMARY_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}}
+            ],
+            'messages': [
+                {"role": "user", "content": prompt}
+            ]
+        }
+
+    def summarize_with_claude(self, title, transcript, segments=None, video_id=None):
+        """Create summary using Claude
 
-Erstelle eine Zusammenfassung mit:
+        Long transcripts are split on segment boundaries (if segments are given)
+        and summarized with summarize_long_transcript(). With a video_id, the
+        partial text is streamed into the store for the web app.
 
-1. SCHNELLÜBERSICHT (2-3 Sätze)
-   → Was LERNE ich konkret in diesem Video?
-   → Was sind die wichtigsten ERKENNTNISSE oder TAKEAWAYS?
-   → Nicht nur beschreiben, sondern die Kernbotschaft erklären!
+        Returns:
+            tuple: (success: bool, summary: str)
+                - success: True if summarization succeeded, False if it failed
+                - summary: The summary text (or error message if failed)
+        """
+        progress = None
+        if video_id:
+            progress = SummaryProgress(self.store, video_id, title, self.calculate_max_tokens(title))
+            progress.start()
+
+        if len(transcript) > LONG_TRANSCRIPT_CHARS:
+            success, summary = self.summarize_long_transcript(title, transcript, segments, progress)
+        else:
+            success, summary = self._summarize_single(title, transcript, progress)
+
+        if progress:
+            if success:
+                progress.finish(summary)
+            else:
+                progress.fail(summary)
+        return (success, summary)
 
-2. HAUPTTHEMA (2-3 Sätze)
-   → Kontext und Hintergrund ausführlicher erklären
-   → Warum ist dieses Thema relevant?
+    def _summarize_single(self, title, transcript, progress=None):
+        """One call for transcripts that fit into the prompt"""
+        params = self.build_summary_params(title, transcript)
+        print(f"🎯 Max Tokens für '{title}': {params['max_tokens']}")
 
-3. KERNPUNKTE{f"   → Dies ist ein Listen-Video! Du musst ALLE {required_points} Punkte einzeln auflisten (1. bis {required_points}.)!" if is_list_video else "   → Bei Listen-Videos: ALLE Punkte! Bei normalen Videos: 5-7 Hauptpunkte"}
-   → Jeder Punkt 1-2 Sätze mit Details
-   → Verwende Nummerierung (1., 2., 3., ...)
+        cached = self.get_cached_summary(params)
+        if cached:
+            print(f"💾 Zusammenfassung aus Cache")
+            return (True, cached)
 
-4. FAZIT (2-3 Sätze)
-   → Zusammenfassung und praktische Relevanz
-   → Was sollte ich als nächstes tun?
+        try:
+            message = self.create_message(progress=progress, **params)
+            return (True, self.cache_summary(params, message.content[0].text))
 
-Format-Beispiel für Listen-Video:
-=================================
-SCHNELLÜBERSICHT
-In diesem Video lernst du 10 konkrete Strategien, um deine Produktivität zu verdoppeln. Die wichtigsten Erkenntnisse: Zeit-Blocking ist effektiver als To-Do-Listen, und kurze Pausen erhöhen die Konzentration nachweislich.
+        except Exception as e:
+            if is_retryable(e):
+                print(f"❌ Claude API überlastet nach {self.claude_max_retries} Versuchen")
+                return (False, f"Zusammenfassung konnte nicht erstellt werden. Claude API ist überlastet. Bitte später erneut versuchen.")
 
-HAUPTTHEMA
-Produktivität ist nicht nur eine Frage der Zeitverwaltung, sondern auch der mentalen Energie...
+            # For other errors, try fallback model
+            print(f"❌ Fehler bei Claude Sonnet 4: {e}")
+            try:
+                print(f"🔄 Versuche mit '{CLAUDE_FALLBACK_MODEL}'...")
+                fallback_params = dict(params, model=CLAUDE_FALLBACK_MODEL)
+                message = self.create_message(progress=progress, **fallback_params)
+                return (True, self.cache_summary(fallback_params, message.content[0].text))
+            except Exception as e2:
+                print(f"❌ Fallback fehlgeschlagen: {e2}")
+                return (False, f"Zusammenfassung konnte nicht erstellt werden. API Fehler: {e}")
+
+    def chunk_transcript(self, transcript, segments=None):
+        """Split a transcript into chunks of about summary_chunk_tokens tokens
+
+        Cuts only between segments (or sentences, if no segments are known).
+        """
+        import re
 
-KERNPUNKTE
-1. Zeit-Blocking: Plane feste Zeitblöcke für Aufgaben statt vage To-Do-Listen...
-2. Pomodoro-Technik: 25 Minuten fokussierte Arbeit, 5 Minuten Pause...
-3. Digital Detox: Handy in den Flugmodus während wichtiger Aufgaben...
-[... alle 10 Punkte auflisten ...]
+        if segments:
+            units = [re.sub(r'\s+', ' ', seg['text']).strip() for seg in segments]
+        else:
+            units = re.split(r'(?<=[.!?])\s+', transcript)
+
+        # Same ~3 characters per token as the rate governor's estimate
+        max_chars = self.summary_chunk_tokens * 3
+        chunks = []
+        current = []
+        current_len = 0
+        for unit in units:
+            if not unit:
+                continue
+            # A single unit without any break (e.g. unpunctuated text) is split by words
+            while len(unit) > max_chars:
+                cut = unit.rfind(' ', 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                head, unit = unit[:cut], unit[cut:].lstrip()
+                if current:
+                    chunks.append(' '.join(current))
+                    current, current_len = [], 0
+                chunks.append(head)
+            if current and current_len + len(unit) + 1 > max_chars:
+                chunks.append(' '.join(current))
+                current, current_len = [], 0
+            current.append(unit)
+            current_len += len(unit) + 1
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
+
+    def summarize_chunk(self, title, index, total, chunk):
+        """Map step: compact notes for one part of a long transcript (None on failure)"""
+        prompt = f"""Dies ist Abschnitt {index} von {total} des Transkripts des YouTube-Videos "{title}".
+
+Transkript-Abschnitt:
+{chunk}
+
+Erstelle stichpunktartige Notizen zu diesem Abschnitt als PLAIN TEXT (ohne Markdown):
+- Alle wichtigen Aussagen, Erkenntnisse, Fakten, Zahlen und Beispiele
+- Nummerierte Punkte, Tipps oder Schritte des Videos mit ihrer ORIGINALNUMMER übernehmen
+- Keine Einleitung und kein Fazit, nur die Notizen"""
 
-FAZIT
-Die Strategien zeigen, dass kleine Änderungen große Wirkung haben können...
-================================="""
+        try:
+            message = self.create_message(
+                model=CLAUDE_MODEL,
+                max_tokens=CHUNK_SUMMARY_MAX_TOKENS,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return message.content[0].text
+        except Exception as e:
+            print(f"❌ Abschnitt {index}/{total} fehlgeschlagen: {e}")
+            return None
 
-        import time
+    def summarize_long_transcript(self, title, transcript, segments=None, progress=None):
+        """Map-reduce summary for transcripts that don't fit into one prompt
 
-        # Dynamische Token-Berechnung basierend auf Titel
+        All chunks are summarized concurrently, then the notes are combined into
+        the usual SCHNELLÜBERSICHT/HAUPTTHEMA/KERNPUNKTE/FAZIT format.
+        Returns (success, summary) like summarize_with_claude().
+        """
         max_tokens = self.calculate_max_tokens(title)
-        print(f"🎯 Max Tokens für '{title}': {max_tokens}")
-
-        # Retry-Logik mit exponential backoff für Overloaded Errors
-        max_retries = 3
-        base_delay = 10  # Sekunden
+        # Cache key covers the full transcript and the chunking settings
+        cache_params = {
+            'mode': 'map-reduce',
+            'model': CLAUDE_MODEL,
+            'max_tokens': max_tokens,
+            'chunk_tokens': self.summary_chunk_tokens,
+            'title': title,
+            'transcript': transcript,
+        }
+        cached = self.get_cached_summary(cache_params)
+        if cached:
+            print(f"💾 Zusammenfassung aus Cache")
+            return (True, cached)
+
+        chunks = self.chunk_transcript(transcript, segments)
+        print(f"📚 Langes Transkript ({len(transcript)} Zeichen): "
+              f"{len(chunks)} Abschnitte werden parallel zusammengefasst...")
+
+        finished = []
+
+        def map_chunk(item):
+            note = self.summarize_chunk(title, item[0], len(chunks), item[1])
+            finished.append(item[0])
+            if progress:
+                progress.note(f"{len(finished)}/{len(chunks)} Abschnitte zusammengefasst")
+            return note
+
+        if progress:
+            progress.note(f"0/{len(chunks)} Abschnitte zusammengefasst")
+        with ThreadPoolExecutor(max_workers=max(1, min(len(chunks), self.summary_chunk_workers))) as pool:
+            notes = list(pool.map(map_chunk, enumerate(chunks, 1)))
+
+        if any(n is None for n in notes):
+            return (False, f"Zusammenfassung konnte nicht erstellt werden. "
+                           f"{sum(n is None for n in notes)} von {len(chunks)} Abschnitten fehlgeschlagen.")
+
+        combined = '\n\n'.join(f"ABSCHNITT {i}/{len(notes)}\n{n}" for i, n in enumerate(notes, 1))
+        params = self.build_summary_params(title, combined, notes=True)
+        print(f"🎯 Max Tokens für '{title}': {params['max_tokens']}")
+
+        if progress:
+            progress.note(None)
+        try:
+            message = self.create_message(progress=progress, **params)
+            return (True, self.cache_summary(cache_params, message.content[0].text))
+        except Exception as e:
+            print(f"❌ Zusammenführen der Abschnitte fehlgeschlagen: {e}")
+            return (False, f"Zusammenfassung konnte nicht erstellt werden. API Fehler: {e}")
+
+    def get_cached_summary(self, params):
+        """Summary of an identical earlier request (same prompt version, model, max_tokens, prompt)"""
+        return self.summary_cache.get(SummaryCache.make_key(PROMPT_VERSION, params))
+
+    def cache_summary(self, params, summary):
+        """Remember a finished summary and return it"""
+        self.summary_cache.put(SummaryCache.make_key(PROMPT_VERSION, params),
+                               PROMPT_VERSION, params['model'], summary)
+        return summary
+
+    def create_message(self, progress=None, **params):
+        """Stream a message through the shared rate governor
+
+        Waits for a free slot in the request/token budget, learns the account
+        limits from the response headers and retries transient errors
+        (429, 529, 5xx, connection errors and overload or rate limit errors
+        reported mid-stream) with backoff. The text is passed to
+        `progress` (a SummaryProgress) while it is being written.
+        """
+        prompt_text = ''.join(str(m['content']) for m in params['messages']) + str(params.get('system', ''))
+        estimated_tokens = self.rate_governor.estimate_tokens(prompt_text)
 
-        for attempt in range(max_retries):
+        for attempt in range(self.claude_max_retries):
+            ticket = self.rate_governor.acquire(estimated_tokens)
+            started = time.monotonic()
+            first_token = None
             try:
-                # Nutze Claude Sonnet 4.5 (neueste Version)
-                message = self.claude_client.messages.create(
-                    model="claude-sonnet-4-20250514",  # Claude Sonnet 4.5
-                    max_tokens=max_tokens,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                return (True, message.content[0].text)
-
+                with self.claude_client.messages.stream(**params) as stream:
+                    for text in stream.text_stream:
+                        if first_token is None:
+                            first_token = time.monotonic() - started
+                        if progress:
+                            progress.append(text)
+                    message = stream.get_final_message()
+                    headers = stream.response.headers
             except Exception as e:
-                error_str = str(e)
-
-                # Check if it's an overloaded error (529)
-                if "overloaded" in error_str.lower() or "529" in error_str:
-                    if attempt < max_retries - 1:
-                        wait_time = base_delay * (2 ** attempt)  # Exponential backoff
-                        print(f"⚠️ Claude API überlastet (529). Warte {wait_time} Sekunden vor Retry {attempt + 1}/{max_retries}...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        print(f"❌ Claude API überlastet nach {max_retries} Versuchen")
-                        return (False, f"Zusammenfassung konnte nicht erstellt werden. Claude API ist überlastet. Bitte später erneut versuchen.")
-
-                # For other errors, try fallback model
-                print(f"❌ Fehler bei Claude Sonnet 4: {e}")
-                try:
-                    print("🔄 Versuche mit 'claude-sonnet-4-latest'...")
-                    message = self.claude_client.messages.create(
-                        model="claude-sonnet-4-latest",
-                        max_tokens=max_tokens,
-                        messages=[
-                            {"role": "user", "content": prompt}
-                        ]
-                    )
-                    return (True, message.content[0].text)
-                except Exception as e2:
-                    print(f"❌ Fallback fehlgeschlagen: {e2}")
-                    return (False, f"Zusammenfassung konnte nicht erstellt werden. API Fehler: {e}")
-    
+                CLAUDE_SECONDS.observe(time.monotonic() - started, model=params['model'], result='error')
+                if progress:
+                    progress.reset()
+                if not is_retryable(e) or attempt == self.claude_max_retries - 1:
+                    raise
+                CLAUDE_RETRIES.inc(model=params['model'])
+                wait_time = self.rate_governor.backoff(e, attempt)
+                print(f"⚠️ Claude API Fehler ({error_type(e) or getattr(e, 'status_code', type(e).__name__)}). "
+                      f"Warte {wait_time:.1f} Sekunden vor Retry {attempt + 1}/{self.claude_max_retries}...")
+                time.sleep(wait_time)
+                continue
+
+            usage = message.usage
+            cache_read = getattr(usage, 'cache_read_input_tokens', None) or 0
+            cache_write = getattr(usage, 'cache_creation_input_tokens', None) or 0
+            model = params['model']
+            CLAUDE_SECONDS.observe(time.monotonic() - started, model=model, result='success')
+            if first_token is not None:
+                CLAUDE_FIRST_TOKEN_SECONDS.observe(first_token, model=model)
+            for kind, tokens in (('input', usage.input_tokens), ('output', usage.output_tokens),
+                                 ('cache_read', cache_read), ('cache_write', cache_write)):
+                CLAUDE_TOKENS.inc(tokens or 0, model=model, kind=kind)
+            self.rate_governor.record_response(
+                ticket, headers,
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+                cache_read_tokens=cache_read,
+                cache_write_tokens=cache_write
+            )
+            print(f"🧊 Prompt-Cache: {cache_read} Tokens gelesen, {cache_write} geschrieben, "
+                  f"{usage.input_tokens} ungecacht | erste Tokens nach {first_token or 0:.1f}s, "
+                  f"fertig nach {time.monotonic() - started:.1f}s")
+            if not (cache_read or cache_write) and self._uses_prompt_cache(params) and not self._cache_note_shown:
+                # The API silently ignores cache_control on prefixes below the model's minimum
+                print("ℹ️  Prompt-Cache greift nicht (Prefix unter der Mindestgröße des Modells)")
+                self._cache_note_shown = True
+            return message
+
+    @staticmethod
+    def _uses_prompt_cache(params):
+        system = params.get('system')
+        return isinstance(system, list) and any('cache_control' in block for block in system)
+
     def is_recently_added(self, added_at_str, days=7):
         """Check if video was added to playlist within the last N days"""
         try:
@@ -544,72 +1065,16 @@ Die Strategien zeigen, dass kleine Änderungen große Wirkung haben können...
             print(f"⚠️  Konnte Datum nicht parsen: {e}")
             return False
 
-    def markdown_to_html(self, text):
-        """Convert simple markdown to HTML"""
-        import re
-
-        # Ersetze **text** mit <strong>text</strong>
-        text = re.sub(r'\*\*([^*]+)\*\*', r'<strong>\1</strong>', text)
-
-        # Ersetze *text* mit <em>text</em>
-        text = re.sub(r'\*([^*]+)\*', r'<em>\1</em>', text)
-
-        # Ersetze # Überschrift mit <h3>
-        text = re.sub(r'^# (.+)$', r'<h3 style="color: #333; margin-top: 20px; margin-bottom: 10px;">\1</h3>', text, flags=re.MULTILINE)
-
-        # Ersetze ## Überschrift mit <h4>
-        text = re.sub(r'^## (.+)$', r'<h4 style="color: #555; margin-top: 15px; margin-bottom: 8px;">\1</h4>', text, flags=re.MULTILINE)
-
-        # Ersetze GROSSBUCHSTABEN-Überschriften
-        text = re.sub(r'^([A-ZÄÖÜ][A-ZÄÖÜ\s]+)$', r'<h3 style="color: #FF0000; margin-top: 20px; margin-bottom: 10px; font-size: 16px;">\1</h3>', text, flags=re.MULTILINE)
+    def render_email_section(self, video_title, video_id, summary):
+        """HTML block for one video; the outbox wraps one or more of them into an email"""
+        video_url = f"https://www.youtube.com/watch?v={video_id}"
+        # Beste vorhandene Auflösung (maxresdefault fehlt bei vielen Videos)
+        thumbnail_url = self.thumbnails.source_url(video_id, 'large')
 
-        # Verarbeite Listen (Zeilen die mit - beginnen)
-        lines = text.split('\n')
-        html_lines = []
-        in_list = False
+        # Konvertiere Markdown zu HTML
+        summary_html = summary_render.render(summary, theme='email')
 
-        for line in lines:
-            stripped = line.strip()
-            if stripped.startswith('- '):
-                if not in_list:
-                    html_lines.append('<ul style="margin: 10px 0; padding-left: 20px;">')
-                    in_list = True
-                html_lines.append(f'<li style="margin: 5px 0;">{stripped[2:]}</li>')
-            else:
-                if in_list:
-                    html_lines.append('</ul>')
-                    in_list = False
-                if stripped == '':
-                    html_lines.append('<br>')
-                elif not stripped.startswith('<'):  # Nicht bereits HTML
-                    html_lines.append(f'<p style="margin: 8px 0;">{line}</p>')
-                else:
-                    html_lines.append(line)
-
-        if in_list:
-            html_lines.append('</ul>')
-
-        return '\n'.join(html_lines)
-
-    def send_email(self, video_title, video_id, summary):
-        """Send email with summary"""
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = f"📺 YouTube Zusammenfassung: {video_title}"
-            msg['From'] = self.email_from
-            msg['To'] = self.email_to
-
-            video_url = f"https://www.youtube.com/watch?v={video_id}"
-            # YouTube Thumbnail URL - maxresdefault für beste Qualität
-            thumbnail_url = f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg"
-
-            # Konvertiere Markdown zu HTML
-            summary_html = self.markdown_to_html(summary)
-
-            html = f"""
-            <html>
-              <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9;">
-                <div style="background: white; padding: 30px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+        return f"""
                   <h2 style="color: #FF0000; margin-top: 0;">📺 {video_title}</h2>
 
                   <!-- Video Thumbnail -->
@@ -624,38 +1089,24 @@ Die Strategien zeigen, dass kleine Änderungen große Wirkung haben können...
                   <div style="line-height: 1.8; color: #333;">
 {summary_html}
                   </div>
-                  <hr style="border: none; border-top: 2px solid #eee; margin: 20px 0;">
-                  <p style="color: #999; font-size: 12px; text-align: center; margin-bottom: 0;">Automatisch generiert von deinem YouTube Watch Later Bot 🤖</p>
-                </div>
-              </body>
-            </html>
-            """
-
-            msg.attach(MIMEText(html, 'html'))
-
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_from, self.email_password)
-                server.send_message(msg)
-
-            print(f"✅ Email gesendet für: {video_title}")
-            return True
+"""
 
-        except Exception as e:
-            print(f"❌ Fehler beim Email-Versand: {e}")
-            return False
-    
     def process_new_videos(self):
         """Main processing loop"""
         print(f"\n🔍 Prüfe Watch Later Liste... ({datetime.now().strftime('%H:%M:%S')})")
 
-        videos = self.get_watch_later_videos()
-        print(f"📋 Bereits verarbeitete Videos: {len(self.processed_videos)}")
+        # Emails that could not be delivered in an earlier cycle
+        self.outbox.drain()
+
+        with PLAYLIST_FETCH_SECONDS.time():
+            videos = self.get_watch_later_videos()
+        processed_ids = self.store.ids()
+        print(f"📋 Bereits verarbeitete Videos: {len(processed_ids)}")
 
         # Filter videos: Nur noch nicht verarbeitete Videos
         videos_to_process = []
         for v in videos:
-            is_new = v['id'] not in self.processed_videos
+            is_new = v['id'] not in processed_ids
             is_recent = self.is_recently_added(v['added_at'], days=7)
 
             print(f"🔍 Video: {v['title'][:50]}... | Neu: {is_new} | Kürzlich: {is_recent} | Datum: {v['added_at']}")
@@ -666,142 +1117,349 @@ Die Strategien zeigen, dass kleine Änderungen große Wirkung haben können...
                 if not is_recent:
                     print(f"⚠️  Video ist älter als 7 Tage, wird trotzdem verarbeitet: {v['title'][:50]}...")
 
+        self.pending_ids = {v['id'] for v in videos_to_process}
         if not videos_to_process:
             print("✨ Keine neuen oder kürzlich hinzugefügten Videos gefunden")
             return
 
         print(f"📹 {len(videos_to_process)} Videos zu verarbeiten!")
 
-        for video in videos_to_process:
-            video_id = video['id']
-            title = video['title']
+        # Transcripts for later videos download while earlier ones are summarized
+        self.pipeline = pipeline = StagedPipeline([
+            Stage('transcript', self._fetch_transcript_stage, workers=self.transcript_workers),
+            Stage('summary', self._summarize_stage, workers=self.summary_workers),
+            Stage('email', self._email_stage, workers=self.email_workers),
+        ])
+        pipeline.run(videos_to_process)
+        # Digest mode sends the whole cycle as one email here
+        self.outbox.drain()
+
+        # Kanal, Dauer etc. für die neuen Videos nachladen
+        self.enrich_metadata()
+
+    def _fetch_transcript_stage(self, video):
+        """Pipeline stage 1: fetch the transcript"""
+        video_id = video['id']
+        title = video['title']
+
+        print(f"\n▶️  Verarbeite: {title}")
+
+        segments = self.get_transcript_segments(video_id)
+        transcript = self.join_segments(segments) if segments else None
+        if not transcript:
+            print(f"⏭️  Überspringe (kein Transkript): {title[:50]}")
+            VIDEOS.inc(result='no_transcript')
+            self.pending_ids.discard(video_id)
+            # Videos ohne Transkript permanent als verarbeitet markieren (nicht wiederholbar)
+            self.store.upsert(video_id, {
+                'title': title,
+                'channel': video.get('channel', 'Unknown'),
+                'thumbnail': video.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg'),
+                'processed_at': datetime.now().isoformat(),
+                'added_at': video.get('added_at', ''),
+                'transcript': '',
+                'summary': 'Kein Transkript verfügbar'
+            }, defaults={'status': 'active'})
+            self.search_index.update(self.store, video_id)
+            return None
 
-            print(f"\n▶️  Verarbeite: {title}")
+        # Segments are kept so long transcripts can be chunked on segment boundaries
+        return dict(video, transcript=transcript, segments=segments)
+
+    def _summarize_stage(self, video):
+        """Pipeline stage 2: summarize with Claude"""
+        print(f"🤖 Erstelle Zusammenfassung mit Claude: {video['title'][:50]}...")
+        success, summary = self.summarize_with_claude(video['title'], video['transcript'],
+                                                      video.get('segments'), video_id=video['id'])
+
+        if not success:
+            print(f"⚠️  Zusammenfassung fehlgeschlagen. Video wird beim nächsten Durchlauf erneut versucht.")
+            VIDEOS.inc(result='summary_failed')
+            self.pending_ids.discard(video['id'])
+            # Video NICHT als verarbeitet markieren, damit es beim nächsten Check erneut versucht wird
+            # (Backoff nach Rate Limits übernimmt der RateGovernor)
+            return None
 
-            # Get transcript
-            transcript = self.get_transcript(video_id)
-            if not transcript:
-                print(f"⏭️  Überspringe (kein Transkript)")
-                # Videos ohne Transkript permanent als verarbeitet markieren (nicht wiederholbar)
-                self.processed_videos[video_id] = {
-                    'title': title,
-                    'channel': video.get('channel', 'Unknown'),
-                    'thumbnail': video.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg'),
-                    'processed_at': datetime.now().isoformat(),
-                    'added_at': video.get('added_at', ''),
-                    'transcript': '',
-                    'summary': 'Kein Transkript verfügbar',
-                    'status': 'active'
-                }
-                self.save_state()
-                continue
+        return dict(video, summary=summary)
+
+    def _email_stage(self, video):
+        """Pipeline stage 3: save the video and queue its email"""
+        video_id = video['id']
+        title = video['title']
+
+        # Saved together with the queued email: a failed delivery is retried
+        # from the outbox and never causes the video to be summarized again
+        self.store.upsert(video_id, {
+            'title': title,
+            'channel': video.get('channel', 'Unknown'),
+            'thumbnail': video.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg'),
+            'processed_at': datetime.now().isoformat(),
+            'added_at': video.get('added_at', ''),
+            **self._transcript_fields(video_id, video['transcript'], video.get('segments')),
+            'summary': video['summary'],
+            'prompt_version': PROMPT_VERSION
+        }, mail={'title': title, 'html': self.render_email_section(title, video_id, video['summary'])},
+            defaults={'status': 'active'})
+        # The saved record replaces the live progress in the web app
+        self.store.clear_progress(video_id)
+        self.search_index.update(self.store, video_id)
+        self.warm_thumbnail(video_id)
+        print(f"✅ Video erfolgreich verarbeitet und als 'processed' markiert: {title[:50]}")
+        VIDEOS.inc(result='processed')
+        self.pending_ids.discard(video_id)
+
+        if not self.email_digest:
+            self.outbox.drain()
+        return video
+
+    def warm_thumbnail(self, video_id):
+        """Fetch the dashboard thumbnail now, so the first page view does not wait for YouTube"""
+        try:
+            self.thumbnails.get(video_id, 'medium')
+        except requests.RequestException as e:
+            print(f"⚠️  Thumbnail für {video_id} nicht geladen: {e}")
 
-            # Create summary
-            print("🤖 Erstelle Zusammenfassung mit Claude...")
-            success, summary = self.summarize_with_claude(title, transcript)
+    def _videos_to_backfill(self, stale=False):
+        """Playlist videos that are already known but lack a summary or transcript
 
-            if not success:
-                print(f"⚠️  Zusammenfassung fehlgeschlagen. Video wird beim nächsten Durchlauf erneut versucht.")
-                # Video NICHT als verarbeitet markieren, damit es beim nächsten Check erneut versucht wird
-                # Delay between videos to avoid rate limiting
-                print("⏳ Warte 45 Sekunden um Rate Limiting zu vermeiden...")
-                time.sleep(45)
+        With stale=True, videos summarized with an older PROMPT_VERSION are included too.
+        Returns a list of (video, existing_record) tuples.
+        """
+        # Get all videos from playlist
+        all_videos = self.get_watch_later_videos(full=True)
+
+        # Filter to only videos that are already marked as processed
+        processed_ids = self.store.ids()
+        videos_to_backfill = []
+        for video in all_videos:
+            if video['id'] not in processed_ids:
                 continue
+            existing = self.store.get(video['id']) or {}
+            # Skip if we already have complete data
+            if existing.get('summary') and existing.get('transcript_chars'):
+                # Records from before prompt versioning were made with version 1
+                if not stale or existing.get('prompt_version', 1) == PROMPT_VERSION:
+                    continue
+            videos_to_backfill.append((video, existing))
 
-            # Send email only if summarization succeeded
-            if self.send_email(title, video_id, summary):
-                # Nur bei erfolgreichem Versand als verarbeitet markieren
-                self.processed_videos[video_id] = {
-                    'title': title,
-                    'channel': video.get('channel', 'Unknown'),
-                    'thumbnail': video.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg'),
-                    'processed_at': datetime.now().isoformat(),
-                    'added_at': video.get('added_at', ''),
-                    'transcript': transcript,
-                    'summary': summary,
-                    'status': 'active'
-                }
-                self.save_state()
-                print(f"✅ Video erfolgreich verarbeitet und als 'processed' markiert")
-            else:
-                print(f"⚠️  Email-Versand fehlgeschlagen. Video wird beim nächsten Durchlauf erneut versucht.")
+        skipped = sum(1 for v in all_videos if v['id'] in processed_ids) - len(videos_to_backfill)
+        print(f"📹 {len(videos_to_backfill)} Videos gefunden zum Nachbearbeiten ({skipped} bereits vollständig)")
+        return videos_to_backfill
 
-            # Delay between videos to avoid rate limiting
-            print("⏳ Warte 45 Sekunden um Rate Limiting zu vermeiden...")
-            time.sleep(45)  # Erhöht auf 45s um API-Überlastung zu vermeiden
-    
-    def backfill_existing_videos(self):
+    def _transcript_fields(self, video_id, transcript, segments=None):
+        """Record fields for a transcript: timed segments if we have them, else the plain text
+
+        The state store keeps segments as compact timing columns next to the text.
+        """
+        if transcript and not segments:
+            cached = self.transcript_cache.get(video_id)
+            segments = cached['segments'] if cached else None
+        if transcript and segments and self.join_segments(segments) == transcript:
+            return {'segments': segments}
+        return {'transcript': transcript}
+
+    def _save_backfill_data(self, video, existing, transcript, summary=None, segments=None):
+        """Save backfilled data (WITHOUT sending email)
+
+        Status bleibt unangetastet (kann parallel in der Web-App geändert werden)
+        """
+        video_id = video['id']
+        record = {
+            'title': video['title'],
+            'channel': video.get('channel', 'Unknown'),
+            'thumbnail': video.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg'),
+            'processed_at': existing.get('processed_at', datetime.now().isoformat()),
+            'added_at': video.get('added_at', ''),
+            **self._transcript_fields(video_id, transcript, segments)
+        }
+        if not transcript:
+            record['summary'] = 'Kein Transkript verfügbar'
+        elif summary is not None:
+            record['summary'] = summary
+            record['prompt_version'] = PROMPT_VERSION
+        self.store.upsert(video_id, record)
+        self.search_index.update(self.store, video_id)
+
+    def backfill_existing_videos(self, stale=False):
         """Re-process all existing videos to add summaries and transcripts (without sending emails)"""
         print("\n🔄 Starte Nachbearbeitung aller bereits verarbeiteten Videos...")
         print("📧 E-Mails werden NICHT erneut versendet")
         print("-" * 50)
 
-        # Get all videos from playlist
-        all_videos = self.get_watch_later_videos()
+        videos_to_backfill = self._videos_to_backfill(stale)
 
-        # Filter to only videos that are already marked as processed
-        videos_to_backfill = [v for v in all_videos if v['id'] in self.processed_videos]
-
-        print(f"📹 {len(videos_to_backfill)} Videos gefunden zum Nachbearbeiten")
-
-        for i, video in enumerate(videos_to_backfill, 1):
+        for i, (video, existing) in enumerate(videos_to_backfill, 1):
             video_id = video['id']
             title = video['title']
 
-            # Skip if we already have complete data
-            if self.processed_videos[video_id].get('summary') and self.processed_videos[video_id].get('transcript'):
-                print(f"⏭️  [{i}/{len(videos_to_backfill)}] Überspringe (bereits vollständig): {title[:50]}...")
-                continue
-
             print(f"\n▶️  [{i}/{len(videos_to_backfill)}] Verarbeite: {title}")
 
             # Get transcript
-            transcript = self.get_transcript(video_id)
+            segments = self.get_transcript_segments(video_id)
+            transcript = self.join_segments(segments) if segments else None
             if not transcript:
                 print(f"⏭️  Kein Transkript verfügbar")
-                self.processed_videos[video_id] = {
-                    'title': title,
-                    'channel': video.get('channel', 'Unknown'),
-                    'thumbnail': video.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg'),
-                    'processed_at': self.processed_videos[video_id].get('processed_at', datetime.now().isoformat()),
-                    'added_at': video.get('added_at', ''),
-                    'transcript': '',
-                    'summary': 'Kein Transkript verfügbar',
-                    'status': self.processed_videos[video_id].get('status', 'active')
-                }
-                self.save_state()
+                self._save_backfill_data(video, existing, '')
                 continue
 
-            # Create summary
+            # Create summary (Pausen bei Rate Limits übernimmt der RateGovernor)
             print("🤖 Erstelle Zusammenfassung mit Claude...")
-            success, summary = self.summarize_with_claude(title, transcript)
+            success, summary = self.summarize_with_claude(title, transcript, segments)
 
             if not success:
                 print(f"⚠️  Zusammenfassung fehlgeschlagen, überspringe dieses Video")
-                time.sleep(45)
                 continue
 
-            # Save data (WITHOUT sending email)
-            self.processed_videos[video_id] = {
-                'title': title,
-                'channel': video.get('channel', 'Unknown'),
-                'thumbnail': video.get('thumbnail', f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg'),
-                'processed_at': self.processed_videos[video_id].get('processed_at', datetime.now().isoformat()),
-                'added_at': video.get('added_at', ''),
-                'transcript': transcript,
-                'summary': summary,
-                'status': self.processed_videos[video_id].get('status', 'active')
-            }
-            self.save_state()
+            self._save_backfill_data(video, existing, transcript, summary, segments)
             print(f"✅ Daten gespeichert (keine E-Mail versendet)")
 
-            # Delay between videos to avoid rate limiting
-            if i < len(videos_to_backfill):
-                print("⏳ Warte 45 Sekunden um Rate Limiting zu vermeiden...")
-                time.sleep(45)
+        self.print_summary_cache_stats()
+        print("\n✅ Nachbearbeitung abgeschlossen!")
+
+    def backfill_with_batch(self, stale=False):
+        """Backfill all pending summaries as one Anthropic Message Batch (without sending emails)
+
+        The batch ID is kept in the state store, so a batch that is still
+        running survives a restart and is picked up again.
+        """
+        print("\n🔄 Starte Nachbearbeitung als Message Batch...")
+        print("📧 E-Mails werden NICHT erneut versendet")
+        print("-" * 50)
+
+        batch_id = self.store.get_meta('backfill_batch_id')
+        if batch_id:
+            print(f"♻️  Setze laufenden Batch fort: {batch_id}")
+            try:
+                self.claude_client.messages.batches.retrieve(batch_id)
+            except anthropic.NotFoundError:
+                print(f"⚠️  Batch {batch_id} existiert nicht mehr, reiche neu ein")
+                batch_id = None
+
+        if not batch_id:
+            batch_id = self.submit_backfill_batch(stale)
+            if not batch_id:
+                print("\n✅ Nichts nachzubearbeiten!")
+                return
+
+        self.wait_for_batch(batch_id)
+        self.apply_batch_results(batch_id)
+        self.store.set_meta('backfill_batch_id', '')
+        self.print_summary_cache_stats()
 
         print("\n✅ Nachbearbeitung abgeschlossen!")
 
+    def submit_backfill_batch(self, stale=False):
+        """Fetch transcripts for all pending videos and submit one summary batch. Returns the batch ID."""
+        videos_to_backfill = self._videos_to_backfill(stale)
+
+        def prepare(item):
+            video, existing = item
+            video_id = video['id']
+            # Reuse a transcript we already have, download only missing ones
+            transcript = self.store.load_transcript(existing) or self.get_transcript(video_id)
+            if not transcript:
+                print(f"⏭️  Kein Transkript verfügbar: {video['title'][:50]}")
+                self._save_backfill_data(video, existing, '')
+                return None
+            if len(transcript) > LONG_TRANSCRIPT_CHARS:
+                # Map-reduce needs several dependent calls, so these don't go into the batch
+                cached_segments = self.transcript_cache.get(video_id)
+                success, summary = self.summarize_long_transcript(
+                    video['title'], transcript, cached_segments['segments'] if cached_segments else None)
+                self._save_backfill_data(video, existing, transcript, summary if success else None)
+                return None
+
+            params = self.build_summary_params(video['title'], transcript)
+            cached = self.get_cached_summary(params)
+            if cached:
+                print(f"💾 Zusammenfassung aus Cache: {video['title'][:50]}")
+                self._save_backfill_data(video, existing, transcript, cached)
+                return None
+            # Transcript is saved right away, the summary arrives with the batch results
+            self._save_backfill_data(video, existing, transcript)
+            return {
+                'custom_id': video_id,
+                'params': params
+            }
+
+        with ThreadPoolExecutor(max_workers=self.transcript_workers) as pool:
+            batch_requests = [r for r in pool.map(prepare, videos_to_backfill) if r]
+
+        if not batch_requests:
+            return None
+
+        batch = self.claude_client.messages.batches.create(requests=batch_requests)
+        self.store.set_meta('backfill_batch_id', batch.id)
+        print(f"📤 Batch {batch.id} mit {len(batch_requests)} Zusammenfassungen eingereicht")
+        return batch.id
+
+    def wait_for_batch(self, batch_id):
+        """Poll a message batch until it has ended"""
+        while True:
+            batch = self.claude_client.messages.batches.retrieve(batch_id)
+            counts = batch.request_counts
+            print(f"⏳ Batch {batch_id}: {batch.processing_status} | "
+                  f"in Arbeit: {counts.processing} | erfolgreich: {counts.succeeded} | "
+                  f"Fehler: {counts.errored + counts.expired + counts.canceled}")
+            if batch.processing_status == 'ended':
+                return batch
+            time.sleep(self.batch_poll_seconds)
+
+    def apply_batch_results(self, batch_id):
+        """Write the summaries of a finished batch back into the state by custom_id"""
+        succeeded = failed = 0
+        for entry in self.claude_client.messages.batches.results(batch_id):
+            video_id = entry.custom_id
+            if entry.result.type != 'succeeded':
+                # Summary stays empty, so the next backfill picks the video up again
+                print(f"⚠️  {video_id}: {entry.result.type}, wird beim nächsten Backfill erneut versucht")
+                failed += 1
+                continue
+
+            summary = entry.result.message.content[0].text
+            self.store.upsert(video_id, {'summary': summary, 'prompt_version': PROMPT_VERSION})
+            self.search_index.update(self.store, video_id)
+
+            # Same params as at submit time, so reruns hit the cache
+            record = self.store.get(video_id)
+            transcript = self.store.load_transcript(record)
+            if transcript:
+                self.cache_summary(self.build_summary_params(record['title'], transcript), summary)
+            succeeded += 1
+
+        print(f"✅ {succeeded} Zusammenfassungen gespeichert, {failed} fehlgeschlagen (keine E-Mails versendet)")
+
+    def add_missing_timings(self):
+        """Store timed segments for older videos whose raw transcript is still cached"""
+        added = 0
+        for video_id in self.store.ids_missing('timing_ref'):
+            record = self.store.get(video_id)
+            if not record.get('transcript_chars'):
+                continue
+            fields = self._transcript_fields(video_id, self.store.load_transcript(record))
+            if 'segments' in fields:
+                self.store.upsert(video_id, fields)
+                added += 1
+        if added:
+            print(f"⏱️  Zeitstempel für {added} Transkripte gespeichert")
+
+    def rerender_summaries(self):
+        """Re-render stored summary HTML that is missing or from an older renderer version"""
+        stale = [video_id for video_id, record in self.store.all().items()
+                 if record.get('summary')
+                 and record.get('summary_html_key') != summary_render.summary_key(record['summary'])]
+        for video_id in stale:
+            # Upserting the summary stores freshly rendered HTML with it
+            self.store.upsert(video_id, {'summary': self.store.get(video_id)['summary']})
+        if stale:
+            print(f"🖌️  HTML für {len(stale)} Zusammenfassungen neu gerendert")
+
+    def print_summary_cache_stats(self):
+        stats = self.summary_cache.stats()
+        print(f"💾 Summary-Cache: {stats['entries']} Einträge | "
+              f"Treffer: {stats['hits']} | Misses: {stats['misses']} | "
+              f"Trefferquote: {stats['hit_rate']:.0%}")
+
     def run(self):
         """Main run loop"""
         print("🚀 YouTube Playlist Summarizer gestartet!")
@@ -810,9 +1468,21 @@ Die Strategien zeigen, dass kleine Änderungen große Wirkung haben können...
         print(f"📧 Emails an: {self.email_to}")
         print("-" * 50)
 
+        # Bring the search index up to date (e.g. after a migration)
+        self.search_index.sync(self.store)
+        # Fill in missing metadata of older videos
+        self.enrich_metadata()
+        self.add_missing_timings()
+        self.rerender_summaries()
+        # Summaries of older prompt versions can never be hit again
+        self.summary_cache.invalidate(keep_version=PROMPT_VERSION)
+        self.print_summary_cache_stats()
+        metrics.start_snapshots('worker')
+
         while True:
             try:
                 self.process_new_videos()
+                self.store.compact(self.journal_days)
             except Exception as e:
                 print(f"❌ Unerwarteter Fehler: {e}")
 